@@ -1,44 +1,350 @@
 """Module Imports"""
 
 import ast
+import time
+from collections import OrderedDict
+from concurrent.futures import wait
+from math import ceil
 from pathlib import Path
 import streamlit as st
 import joblib
 from src.config import MODELS_RELATIVE_MODEL_PATH
+from src.dispatcher import QueryDispatcher
+from src.profiling import profile_stage, request_profiling_allowed
+from src.thread_budget import limit_threads
 
+# Number of recipe cards rendered per results page
+RESULTS_PER_PAGE = 10
 
-def load_model():
+# Maximum number of search results fetched and paged through
+MAX_SEARCH_RESULTS = 100
+
+# Search queries shorter than this are not sent to the model
+MIN_SEARCH_LENGTH = 2
+
+# Background query workers shared by all sessions
+QUERY_WORKERS = 4
+
+# How long a run waits for a query before streaming the results in later
+INLINE_WAIT_SECONDS = 0.3
+
+# Polling interval while a background query is still running
+QUERY_POLL_SECONDS = 0.5
+
+# Number of recent query results memoized per session
+QUERY_CACHE_SIZE = 16
+
+# URL query parameter (?profile=1) that profiles each query of the session,
+# honoured only when the server runs with RECIPE_PROFILE_REQUESTS=1
+PROFILE_QUERY_PARAM = "profile"
+
+
+def model_path():
     """
-    Load the machine learning model from the specified directory.
+    Resolve the saved model file next to this script.
 
-    :param model_name: The name of the joblib file containing the saved model.
-    :return: Loaded model object, or None if not found.
+    :return: Absolute path of the joblib model file.
     """
     base_dir = Path(__file__).resolve().parent
-    model_path = (base_dir / MODELS_RELATIVE_MODEL_PATH).resolve()
+    return (base_dir / MODELS_RELATIVE_MODEL_PATH).resolve()
+
+
+@st.cache_resource(show_spinner="Loading model...")
+def load_cached_model():
+    """
+    Load the model once per process.
+
+    Errors are raised rather than returned, so a failed load is not cached
+    and the next run tries again (e.g. once the model file is restored).
+
+    :return: Loaded model object.
+    """
+    loaded_model = joblib.load(model_path())
 
+    # Keep each app process to its serving thread budget (BLAS/OpenMP)
+    limit_threads("serving")
+    return loaded_model
+
+
+def load_model():
+    """
+    Load the machine learning model, showing an error if it is unavailable.
+
+    :return: Loaded model object, or None if not found.
+    """
     try:
-        # Attempt to load the model
-        loaded_model = joblib.load(model_path)
-        return loaded_model
+        return load_cached_model()
 
     except FileNotFoundError:
         st.error(
-            f"Model file not found: {model_path}. Please ensure it exists in './models'."
+            f"Model file not found: {model_path()}. Please ensure it exists in './models'."
         )
         return None
 
-    except (joblib.externals.loky.process_executor.TerminatedWorkerError, IOError) as e:
+    except (
+        joblib.externals.loky.process_executor.TerminatedWorkerError,
+        IOError,
+        ValueError,
+    ) as e:
         st.error(f"An error occurred while loading the model: {e}")
         return None
 
 
+@st.cache_resource
+def get_query_dispatcher():
+    """
+    Start the query dispatcher shared by all sessions.
+
+    Identical queries from concurrent sessions share one computation and
+    recommend queries are micro-batched.
+
+    Only called once load_model has succeeded.
+
+    :return: Running QueryDispatcher.
+    """
+    return QueryDispatcher(load_cached_model(), max_workers=QUERY_WORKERS).start()
+
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def format_recipe_details(ingredients, steps):
+    """
+    Pre-format a recipe's ingredients and steps as a single markdown block.
+
+    :param ingredients: Stringified list of ingredients.
+    :param steps: Stringified list of steps.
+    :return: Markdown string with the ingredient list and numbered steps.
+    """
+    ingredient_list = ", ".join(
+        ingredient.title() for ingredient in ast.literal_eval(ingredients)
+    )
+    step_list = "\n".join(
+        f"{i}. {step.capitalize()}" for i, step in enumerate(ast.literal_eval(steps), 1)
+    )
+    return f"**Ingredients:**\n\n{ingredient_list}\n\n**Steps:**\n\n{step_list}"
+
+
+def select_recipe(label):
+    """
+    Show recipes similar to a recipe, or go back to the results with None.
+
+    :param label: Index label of the selected recipe, or None.
+    """
+    st.session_state["selected_recipe"] = label
+
+
+def render_recipe_card(recipe, key, label):
+    """
+    Render a compact recipe card whose details are only built when expanded.
+
+    :param recipe: Mapping with the recipe's columns.
+    :param key: Unique widget key for the card.
+    :param label: Index label of the recipe in the model's data.
+    """
+    with st.container(border=True):
+        st.markdown(
+            f"### {recipe['name'].title()}\n"
+            f"**Cook Time:** {recipe['minutes']} minutes · "
+            f"**Complexity:** {recipe['complexity_score']}"
+        )
+        if st.toggle("Show ingredients and steps", key=key):
+            st.markdown(format_recipe_details(recipe["ingredients"], recipe["steps"]))
+        st.button(
+            "More like this",
+            key=f"{key}_similar",
+            on_click=select_recipe,
+            args=(label,),
+        )
+
+
+def render_results(results, key_prefix):
+    """
+    Render one page of result cards with a page selector.
+
+    :param results: DataFrame of recipes to display.
+    :param key_prefix: Prefix for this result list's widget keys.
+    """
+    n_pages = max(1, ceil(len(results) / RESULTS_PER_PAGE))
+    page_key = f"{key_prefix}_page"
+
+    # Reset the page when a new, shorter result set arrives
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = 1
+
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(
+            "Page", min_value=1, max_value=n_pages, step=1, key=page_key
+        )
+
+    start = (page - 1) * RESULTS_PER_PAGE
+    page_results = results.iloc[start : start + RESULTS_PER_PAGE]
+    st.caption(
+        f"Showing {start + 1}-{start + len(page_results)} of {len(results)} recipes"
+    )
+
+    for label, recipe in zip(page_results.index, page_results.to_dict("records")):
+        render_recipe_card(recipe, key=f"{key_prefix}_details_{label}", label=label)
+
+
+def init_session_state():
+    """Create the per-session keys once instead of resetting them every rerun."""
+    for key in ("recommendations", "selected_recipe", "search_results"):
+        st.session_state.setdefault(key, None)
+    st.session_state.setdefault("pending_query", None)
+    st.session_state.setdefault("last_search", "")
+    st.session_state.setdefault("query_cache", OrderedDict())
+
+
+def show_query_results(kind, results):
+    """
+    Make one result list the active view.
+
+    :param kind: Session state key of the results ("recommendations" or "search_results").
+    :param results: DataFrame of recipes.
+    """
+    st.session_state["recommendations"] = None
+    st.session_state["search_results"] = None
+    st.session_state["selected_recipe"] = None
+    st.session_state[kind] = results
+
+
+def collect_pending_query():
+    """
+    Move a finished background query into the session's results and cache.
+
+    :return: True if a pending query finished during this call.
+    """
+    pending = st.session_state["pending_query"]
+    if pending is None or not pending["future"].done():
+        return False
+
+    st.session_state["pending_query"] = None
+    try:
+        results = pending["future"].result()
+    except ValueError as e:
+        st.error(f"Could not run your query: {e}")
+        return True
+
+    cache = st.session_state["query_cache"]
+    cache[pending["key"]] = results
+    while len(cache) > QUERY_CACHE_SIZE:
+        cache.popitem(last=False)
+
+    show_query_results(pending["key"][0], results)
+    return True
+
+
+def cancel_pending_query(kind=None):
+    """
+    Cancel the session's background query, so it is never shown.
+
+    :param kind: Only cancel a query whose results go to this key (default: any).
+    """
+    pending = st.session_state["pending_query"]
+    if pending is not None and kind in (None, pending["key"][0]):
+        pending["future"].cancel()
+        st.session_state["pending_query"] = None
+
+
+def run_query(kind, params, query, *args):
+    """
+    Answer a query from the session cache or submit it to the dispatcher.
+
+    A newer query replaces (and cancels) a pending one, so only the latest
+    search input is computed.
+
+    :param kind: Session state key the results are stored under.
+    :param params: Hashable query parameters used as the memoization key.
+    :param query: Dispatcher coroutine method computing the results.
+    :param args: Arguments for query.
+    """
+    key = (kind, params)
+    cache = st.session_state["query_cache"]
+    if key in cache:
+        cache.move_to_end(key)
+        show_query_results(kind, cache[key])
+        return
+
+    pending = st.session_state["pending_query"]
+    if pending is not None and pending["key"] == key:
+        return
+    cancel_pending_query()
+
+    future = get_query_dispatcher().submit(query, *args)
+    st.session_state["pending_query"] = {
+        "key": key,
+        "future": future,
+        "submitted": time.monotonic(),
+    }
+
+    # Fast queries render in this run; slow ones are streamed in by polling
+    wait([future], timeout=INLINE_WAIT_SECONDS)
+    collect_pending_query()
+
+
+def run_profiled_query(kind, compute, *args, **kwargs):
+    """
+    Run one query inline under the CPU and allocation profiler.
+
+    The query bypasses the session cache and the dispatcher, so the capture
+    holds exactly this request.
+
+    :param kind: Session state key the results are stored under.
+    :param compute: Model method computing the results.
+    :param args: Arguments for compute.
+    :param kwargs: Keyword arguments for compute.
+    """
+    cancel_pending_query()
+
+    with profile_stage(f"app_{kind}", enabled=True) as capture:
+        try:
+            results = compute(*args, **kwargs)
+        except ValueError as e:
+            st.error(f"Could not run your query: {e}")
+            return
+
+    show_query_results(kind, results)
+    if capture.paths:
+        st.info(f"Profile written to {capture.paths['pstats'].with_suffix('.*')}")
+
+
+def search_with_fuzzy_fallback(model, search_query, n_results):
+    """
+    Search for exact matches, retrying typo-tolerantly if there are none.
+
+    :param model: Loaded RecipeRecommender.
+    :param search_query: Normalized search query.
+    :param n_results: Maximum number of results.
+    :return: DataFrame of matching recipes.
+    """
+    results = model.search_recipes(search_query, n_results)
+    if results.empty:
+        results = model.search_recipes(search_query, n_results, fuzzy=True)
+    return results
+
+
+@st.fragment(run_every=QUERY_POLL_SECONDS)
+def poll_pending_query():
+    """Poll a running background query and rerun the app once it finishes."""
+    if collect_pending_query():
+        st.rerun()
+
+    pending = st.session_state["pending_query"]
+    if pending is not None:
+        elapsed = time.monotonic() - pending["submitted"]
+        st.info(f"Finding recipes... ({elapsed:.1f}s)")
+
+
 def main():
     """Main script to execute the recipe recommendation system."""
     loaded_model = load_model()
-    st.session_state["recommendations"] = None
-    st.session_state["selected_recipe"] = None
-    st.session_state["search_results"] = None
+    init_session_state()
+
+    # ?profile=1 runs each query inline and writes its profile, if the operator
+    # allows it (see src/profiling.py)
+    profile_queries = (
+        request_profiling_allowed() and st.query_params.get(PROFILE_QUERY_PARAM) == "1"
+    )
 
     # Sidebar: A place to add user input controls
     with st.sidebar:
@@ -48,14 +354,30 @@ def main():
             "Search by recipe name or ingredient:", key="search_input"
         )
 
-        if loaded_model is not None and search_query.strip():
-            # Get search results
-            search_results = loaded_model.search_recipes(search_query)
-
-            # Store search results in session state
-            st.session_state["search_results"] = search_results
-            st.session_state["recommendations"] = None
-            st.session_state["selected_recipe"] = None
+        # Only search again when the normalized query actually changes
+        normalized_query = " ".join(search_query.lower().split())
+        if normalized_query != st.session_state["last_search"]:
+            st.session_state["last_search"] = normalized_query
+            if loaded_model is None or len(normalized_query) < MIN_SEARCH_LENGTH:
+                # A search still running for the old input must not be shown
+                cancel_pending_query("search_results")
+                st.session_state["search_results"] = None
+            elif profile_queries:
+                run_profiled_query(
+                    "search_results",
+                    search_with_fuzzy_fallback,
+                    loaded_model,
+                    normalized_query,
+                    MAX_SEARCH_RESULTS,
+                )
+            else:
+                run_query(
+                    "search_results",
+                    (normalized_query,),
+                    get_query_dispatcher().search_with_fuzzy_fallback,
+                    normalized_query,
+                    MAX_SEARCH_RESULTS,
+                )
 
         st.write("---")
 
@@ -72,20 +394,49 @@ def main():
             "Desired complexity (0-50) for your recipe:", min_value=0, max_value=50
         )
 
+        # Optional Food.com user id, to rank recipes like the ones they rated well
+        food_com_user_id = None
+        if getattr(loaded_model, "personalization", None) is not None:
+            food_com_user_id = st.number_input(
+                "Food.com user id (optional, personalizes the results):",
+                min_value=0,
+                value=None,
+                step=1,
+            )
+
         if loaded_model is not None and user_name and cook_time and complexity:
             if st.button("Recommend Recipes"):
-                # Get recommendations
-                recommendations = loaded_model.recommend_recipes(cook_time, complexity)
+                # Get recommendations (memoized per session)
+                user_id = None if food_com_user_id is None else int(food_com_user_id)
+                if profile_queries:
+                    run_profiled_query(
+                        "recommendations",
+                        loaded_model.recommend_recipes,
+                        cook_time,
+                        complexity,
+                        5,
+                        user_id=user_id,
+                    )
+                else:
+                    run_query(
+                        "recommendations",
+                        (cook_time, complexity, user_id),
+                        get_query_dispatcher().recommend,
+                        cook_time,
+                        complexity,
+                        5,
+                        user_id,
+                    )
 
-                # Store recommendations in session state
-                st.session_state["recommendations"] = recommendations
-                st.session_state["search_results"] = None
-                st.session_state["selected_recipe"] = None
+    if st.session_state["pending_query"] is not None:
+        poll_pending_query()
 
     if (
         "recommendations" in st.session_state
         and st.session_state["recommendations"] is None
         and st.session_state["search_results"] is None
+        and st.session_state["pending_query"] is None
+        and st.session_state["selected_recipe"] is None
     ):
         # Title and a brief description of what our app does
         st.title("Recipe Recommendation App")
@@ -115,33 +466,27 @@ def main():
         if user_name and cook_time and complexity and loaded_model is not None:
             st.success("Great! Now we can recommend some recipes for you.")
 
+    # Show recipes similar to the selected one (precomputed neighbours)
+    if st.session_state["selected_recipe"] is not None and loaded_model is not None:
+        selected = st.session_state["selected_recipe"]
+        st.title(f"More Like {loaded_model.data.loc[selected, 'name'].title()}:")
+        st.button("Back to results", on_click=select_recipe, args=(None,))
+        similar = loaded_model.similar_recipes(selected)
+        if similar.empty:
+            st.write("No similar recipes found.")
+        else:
+            render_results(similar, "similar")
+
     # Show all recommendations and their details
-    if (
+    elif (
         "recommendations" in st.session_state
         and st.session_state["recommendations"] is not None
     ):
         st.title(f"{user_name}'s Recommended Recipes:")
-        for _, row in st.session_state["recommendations"].iterrows():
-            st.write("---")
-            st.write(f"## {row['name'].title()}")
-            st.write(f"**Cook Time:** {row['minutes']} minutes")
-            st.write(f"**Complexity:** {row['complexity_score']}")
-            st.write("**Ingredients:**")
-            st.write(
-                ", ".join(
-                    [
-                        ingredient.title()
-                        for ingredient in ast.literal_eval(row["ingredients"])
-                    ]
-                )
-            )
-            st.write("**Steps:**")
-            steps = ast.literal_eval(row["steps"])
-            for i, step in enumerate(steps, 1):
-                st.write(f"{i}. {step.capitalize()}")
+        render_results(st.session_state["recommendations"], "recommendations")
 
     # Show search results
-    if (
+    elif (
         "search_results" in st.session_state
         and st.session_state["search_results"] is not None
     ):
@@ -151,24 +496,7 @@ def main():
             st.write("Try searching with different keywords or ingredients.")
         else:
             st.title("Search Results:")
-            for _, row in search_results.iterrows():
-                st.write("---")
-                st.write(f"## {row['name'].title()}")
-                st.write(f"**Cook Time:** {row['minutes']} minutes")
-                st.write(f"**Complexity:** {row['complexity_score']}")
-                st.write("**Ingredients:**")
-                st.write(
-                    ", ".join(
-                        [
-                            ingredient.title()
-                            for ingredient in ast.literal_eval(row["ingredients"])
-                        ]
-                    )
-                )
-                st.write("**Steps:**")
-                steps = ast.literal_eval(row["steps"])
-                for i, step in enumerate(steps, 1):
-                    st.write(f"{i}. {step.capitalize()}")
+            render_results(search_results, "search")
 
 
 if __name__ == "__main__":
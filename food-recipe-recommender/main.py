@@ -12,6 +12,7 @@ from src.preprocessing import (
     plot_prep_time_vs_ingredients,
     plot_most_used_ingredients,
 )
+from src.dedup import deduplicate_recipes
 from src.features import select_features
 from src.modeling import (
     optimal_number_of_clusters,
@@ -20,24 +21,28 @@ from src.modeling import (
 )
 from src.validation_checks import check_class_distribution, check_data_leakage
 from src.recommender import RecipeRecommender
+from src.profiling import profile_stage
 
 
 def main():
     """Main script to execute the recipe recommendation model."""
+    # Set RECIPE_PROFILE=all (or a list of stage names) to write CPU and
+    # allocation profiles of each stage to ./profiles (see src/profiling.py)
+
     #################################
     # Load the Data
     #################################
-    recipes, interactions = load_data()
-
-    # Drop missing values in recipes
-    recipes_cleaned = recipes.dropna()
+    with profile_stage("load_data"):
+        recipes, interactions = load_data()
 
     #################################
     # Sanitize the Recipes Data
     #################################
 
-    # Drop recipes with preparation times over 180 minutes
-    recipes_cleaned = recipes_cleaned[recipes_cleaned['minutes'] <= 180]
+    # Drop recipes with missing values or preparation times over 180 minutes,
+    # copying the kept rows once
+    with profile_stage("sanitize"):
+        recipes_cleaned = recipes[recipes.notna().all(axis=1) & (recipes['minutes'] <= 180)]
 
     # Summarize data for an initial understanding
     summary_data(recipes, interactions)
@@ -58,7 +63,8 @@ def main():
     # #################################
 
     # # Preprocess the dataset
-    # recipes_cleaned, interactions_cleaned = preprocess_data(recipes_cleaned, interactions)
+    # with profile_stage("preprocess_data"):
+    #     recipes_cleaned, interactions_cleaned = preprocess_data(recipes_cleaned, interactions)
 
     # # Visualize Preparation Time vs Number of Ingredients
     # plot_prep_time_vs_ingredients(recipes_cleaned)
@@ -66,12 +72,22 @@ def main():
     # # Visualize Most Used Ingredients
     # plot_most_used_ingredients(recipes_cleaned)
 
+    # #################################
+    # # Remove Near-Duplicate Recipes
+    # #################################
+
+    # # Collapse near-identical recipes (MinHash LSH over ingredients and step
+    # # shingles) to their highest-rated version; prints sizes and runtime
+    # with profile_stage("deduplicate"):
+    #     recipes_cleaned = deduplicate_recipes(recipes_cleaned, interactions_cleaned)
+
     # #################################
     # # Feature Engineering & Selection
     # #################################
 
     # # Feature selection
-    # selected_features = select_features(recipes_cleaned, interactions_cleaned)
+    # with profile_stage("select_features"):
+    #     selected_features = select_features(recipes_cleaned, interactions_cleaned)
 
     # # Print the first few rows to verify
     # print("Selected Features Sample:")
@@ -112,7 +128,9 @@ def main():
     # #################################
 
     # # Initialize the Recipe Recommender
-    # recommender = RecipeRecommender(selected_features)  # k=5: Number of recommendations to make
+    # # Ratings in interactions_cleaned personalize recommendations for known users
+    # # (the build is profiled as the "build_model" stage)
+    # recommender = RecipeRecommender(selected_features, interactions=interactions_cleaned)
 
     # # Ask for user input (simulating with predefined values)
     # desired_time = 30  # Example: User wants a 30-minute recipe
@@ -121,9 +139,18 @@ def main():
     # # Get recipe recommendations
     # recommendations = recommender.recommend_recipes(desired_time, desired_complexity)
 
+    # # Personalized recommendations for a Food.com user
+    # user_id = interactions_cleaned['user_id'].iloc[0]
+    # personalized = recommender.recommend_recipes(desired_time, desired_complexity, user_id=user_id)
+
     # # Display recommendations
     # print("\nRecommended Recipes:")
     # print(recommendations[['minutes', 'complexity_score', 'similarity_distance']])
 
+    # # Most used ingredients of the modelled recipes, from the statistics
+    # # saved with the model instead of parsing the ingredients again
+    # plot_most_used_ingredients(recommender.data, stats=recommender.ingredient_stats)
+
+
 if __name__ == "__main__":
     main()
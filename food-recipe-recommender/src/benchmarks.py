@@ -0,0 +1,370 @@
+"""
+benchmarks.py
+Module for benchmarking the Recipe Recommender System.
+
+Run from the food-recipe-recommender directory with ``python -m src.benchmarks``
+(add ``--build-memory`` to also measure a full rebuild from the raw data).
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .cluster_kernel import ClusterAssigner
+from .config import RECIPE_RECOMMENDER_MODEL_PATH
+from .dispatcher import MAX_BATCH_SIZE, QueryDispatcher
+from .thread_budget import limit_threads, thread_budget
+
+# Statements whose cold-start time is tracked, from the serving path to training
+IMPORT_BENCHMARKS = {
+    "serving: import src.recommender": "import src.recommender",
+    "import src.validation_checks": "import src.validation_checks",
+    "import src.preprocessing": "import src.preprocessing",
+    "training: import src.modeling": "import src.modeling",
+}
+
+# Heavy dependencies that should stay off the serving import path
+HEAVY_MODULES = ["sklearn", "scipy", "matplotlib", "seaborn", "wordcloud"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def benchmark_import_time(statement, repeats=5):
+    """
+    Measure the cold-start time of a statement in fresh interpreters.
+
+    Args:
+        statement (str): Python code to time, e.g. "import src.recommender".
+        repeats (int): Number of fresh interpreters to run.
+
+    Returns:
+        dict: Median and per-run seconds plus the heavy modules that got loaded.
+    """
+    probe = _IMPORT_PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    return {
+        "median_seconds": statistics.median(run["seconds"] for run in runs),
+        "runs": [run["seconds"] for run in runs],
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def run_import_benchmarks(repeats=5):
+    """
+    Benchmark every tracked import statement and loading the saved model.
+
+    Args:
+        repeats (int): Number of fresh interpreters per statement.
+
+    Returns:
+        dict: Benchmark name mapped to its benchmark_import_time result.
+    """
+    benchmarks = dict(IMPORT_BENCHMARKS)
+    if RECIPE_RECOMMENDER_MODEL_PATH.exists():
+        benchmarks["serving: load model"] = (
+            f"import joblib; joblib.load({str(RECIPE_RECOMMENDER_MODEL_PATH)!r})"
+        )
+
+    return {
+        name: benchmark_import_time(statement, repeats)
+        for name, statement in benchmarks.items()
+    }
+
+
+def benchmark_cluster_assignment(n_calls=2000, n_samples=50000, random_state=42):
+    """
+    Compare per-query cluster assignment cost of sklearn and the serving kernel.
+
+    Args:
+        n_calls (int): Number of single-point queries to time.
+        n_samples (int): Size of the synthetic (minutes, complexity) training set.
+        random_state (int): Seed for the synthetic data and k-means.
+
+    Returns:
+        dict: Mean microseconds per call for each path and the number of
+            label mismatches on the queried points.
+    """
+    import pandas as pd
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(random_state)
+    columns = ["minutes", "complexity_score"]
+    features = pd.DataFrame(
+        np.column_stack(
+            [rng.integers(0, 61, n_samples), rng.integers(1, 101, n_samples)]
+        ),
+        columns=columns,
+    )
+    scaler = StandardScaler()
+    kmeans = KMeans(n_clusters=6, random_state=random_state)
+    kmeans.fit(pd.DataFrame(scaler.fit_transform(features), columns=columns))
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+
+    queries = np.column_stack(
+        [rng.integers(0, 31, n_calls), rng.integers(0, 51, n_calls)]
+    )
+
+    start = time.perf_counter()
+    sklearn_labels = [
+        kmeans.predict(
+            pd.DataFrame(
+                scaler.transform(pd.DataFrame([query], columns=columns)),
+                columns=columns,
+            )
+        )[0]
+        for query in queries
+    ]
+    sklearn_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kernel_labels = [assigner.assign_one(*query) for query in queries]
+    kernel_seconds = time.perf_counter() - start
+
+    return {
+        "sklearn_us_per_call": sklearn_seconds / n_calls * 1e6,
+        "kernel_us_per_call": kernel_seconds / n_calls * 1e6,
+        "mismatches": int(np.count_nonzero(np.array(sklearn_labels) != kernel_labels)),
+    }
+
+
+def benchmark_dispatcher(recommender, n_queries=3000, random_state=42):
+    """
+    Compare answering a burst of queries directly and through the dispatcher.
+
+    Queries are drawn from the app's slider ranges, so popular settings repeat
+    the way they do under real load.
+
+    Args:
+        recommender (RecipeRecommender): Trained model.
+        n_queries (int): Number of concurrent recommend queries.
+        random_state (int): Seed for the synthetic queries.
+
+    Returns:
+        dict: Wall-clock queries per second and CPU seconds for each path,
+            plus the dispatcher's coalescing and batching counters.
+    """
+    rng = np.random.default_rng(random_state)
+    queries = np.column_stack(
+        [rng.integers(0, 31, n_queries), rng.integers(0, 51, n_queries)]
+    ).tolist()
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    for desired_time, desired_complexity in queries:
+        recommender.recommend_recipes(desired_time, desired_complexity)
+    direct_seconds = time.perf_counter() - start
+    direct_cpu = time.process_time() - cpu_start
+
+    dispatcher = QueryDispatcher(recommender)
+
+    async def burst():
+        await asyncio.gather(*(dispatcher.recommend(*query) for query in queries))
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    asyncio.run(burst())
+    dispatcher_seconds = time.perf_counter() - start
+    dispatcher_cpu = time.process_time() - cpu_start
+    dispatcher.close()
+
+    return {
+        "direct_qps": n_queries / direct_seconds,
+        "direct_cpu_seconds": direct_cpu,
+        "dispatcher_qps": n_queries / dispatcher_seconds,
+        "dispatcher_cpu_seconds": dispatcher_cpu,
+        "stats": dispatcher.stats,
+    }
+
+
+def _latency_worker(model_path, threads, n_batches, batch_size, seed):
+    """Time recommend batches in a fresh process limited to some BLAS threads."""
+    import joblib
+
+    limit_threads(threads=threads)
+    recommender = joblib.load(model_path)
+    rng = np.random.default_rng(seed)
+
+    latencies = []
+    for _ in range(n_batches):
+        preferences = np.column_stack(
+            [rng.integers(0, 31, batch_size), rng.integers(0, 51, batch_size)]
+        ).tolist()
+        start = time.perf_counter()
+        recommender.recommend_recipes_batch(preferences, diversity=0.3)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def benchmark_thread_budget(
+    n_processes=None, n_batches=200, batch_size=MAX_BATCH_SIZE, random_state=42
+):
+    """
+    Compare serving tail latency with and without the serving thread budget.
+
+    Several serving processes answer recommend batches side by side, first
+    with every process allowed one BLAS/OpenMP thread per core (the library
+    default, and the training budget) and then with the serving budget.
+
+    Args:
+        n_processes (int): Concurrent serving processes (default: one per core).
+        n_batches (int): Recommend batches timed per process.
+        batch_size (int): Queries per batch (the dispatcher's largest batch).
+        random_state (int): Seed for the synthetic queries.
+
+    Returns:
+        dict: p50 and p99 batch latency in seconds per thread setting.
+    """
+    n_processes = n_processes or os.cpu_count() or 1
+    settings = {
+        f"{mode} budget ({thread_budget(mode)} threads)": thread_budget(mode)
+        for mode in ("training", "serving")
+    }
+
+    results = {}
+    for name, threads in settings.items():
+        with ProcessPoolExecutor(
+            max_workers=n_processes, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            runs = executor.map(
+                _latency_worker,
+                [str(RECIPE_RECOMMENDER_MODEL_PATH)] * n_processes,
+                [threads] * n_processes,
+                [n_batches] * n_processes,
+                [batch_size] * n_processes,
+                range(random_state, random_state + n_processes),
+            )
+            latencies = np.concatenate([np.asarray(run) for run in runs])
+        results[name] = {
+            "p50_seconds": float(np.percentile(latencies, 50)),
+            "p99_seconds": float(np.percentile(latencies, 99)),
+        }
+    return results
+
+
+def benchmark_build_memory(recipes, interactions, n_clusters=6):
+    """
+    Measure the traced peak memory of a full model rebuild, stage by stage.
+
+    Runs preprocess_data, select_features and RecipeRecommender under
+    tracemalloc. The rebuilt model is not saved, so the model in the models
+    directory is left untouched. Peaks are
+    measured above the memory already held by the loaded input frames.
+
+    Args:
+        recipes (DataFrame): Raw recipes, as returned by load_data.
+        interactions (DataFrame): Raw interactions, as returned by load_data.
+        n_clusters (int): Number of k-means clusters.
+
+    Returns:
+        dict: Peak bytes per stage, the overall peak under "total" and the
+            size of the built model's data under "model_data".
+    """
+    from .features import select_features
+    from .preprocessing import preprocess_data
+    from .recommender import RecipeRecommender
+
+    peaks = {}
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        overall = 0
+
+        def stage(name, function, *args, **kwargs):
+            nonlocal overall
+            tracemalloc.reset_peak()
+            result = function(*args, **kwargs)
+            peaks[name] = tracemalloc.get_traced_memory()[1] - baseline
+            overall = max(overall, peaks[name])
+            return result
+
+        recipes_cleaned, interactions_cleaned = stage(
+            "preprocess_data", preprocess_data, recipes, interactions
+        )
+        selected = stage(
+            "select_features", select_features, recipes_cleaned, interactions_cleaned
+        )
+        del recipes_cleaned
+        recommender = stage(
+            "RecipeRecommender",
+            RecipeRecommender,
+            selected,
+            n_clusters=n_clusters,
+            interactions=interactions_cleaned,
+            save=False,
+        )
+    finally:
+        tracemalloc.stop()
+
+    peaks["total"] = overall
+    peaks["model_data"] = int(recommender.data.memory_usage(deep=True).sum())
+    return peaks
+
+
+def main():
+    """Print the benchmark results."""
+    print("Import-time benchmark (median of fresh interpreters):")
+    for name, result in run_import_benchmarks().items():
+        loaded = ", ".join(result["loaded"]) or "none"
+        print(
+            f"  {name:<35} {result['median_seconds'] * 1000:8.1f} ms"
+            f"  heavy modules: {loaded}"
+        )
+
+    print("\nCluster assignment per query:")
+    result = benchmark_cluster_assignment()
+    print(f"  sklearn scaler + KMeans.predict  {result['sklearn_us_per_call']:8.1f} us")
+    print(f"  ClusterAssigner.assign_one       {result['kernel_us_per_call']:8.1f} us")
+    print(f"  label mismatches                 {result['mismatches']:8d}")
+
+    if "--build-memory" in sys.argv[1:]:
+        from .preprocessing import load_data
+
+        print("\nFull rebuild peak memory (tracemalloc):")
+        for name, peak in benchmark_build_memory(*load_data()).items():
+            print(f"  {name:<20} {peak / 2**20:10.1f} MiB")
+
+    if RECIPE_RECOMMENDER_MODEL_PATH.exists():
+        import joblib
+
+        print("\nBurst of recommend queries:")
+        result = benchmark_dispatcher(joblib.load(RECIPE_RECOMMENDER_MODEL_PATH))
+        print(
+            f"  direct      {result['direct_qps']:8.0f} qps"
+            f"  {result['direct_cpu_seconds']:6.2f} s CPU"
+        )
+        print(
+            f"  dispatcher  {result['dispatcher_qps']:8.0f} qps"
+            f"  {result['dispatcher_cpu_seconds']:6.2f} s CPU"
+            f"  ({result['stats']['coalesced']} coalesced,"
+            f" {result['stats']['batches']} batches)"
+        )
+
+        print(f"\nRecommend batch latency, {os.cpu_count()} serving processes:")
+        for name, result in benchmark_thread_budget().items():
+            print(
+                f"  {name:<32} p50 {result['p50_seconds'] * 1000:7.2f} ms"
+                f"  p99 {result['p99_seconds'] * 1000:7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
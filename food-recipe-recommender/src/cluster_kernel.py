@@ -0,0 +1,135 @@
+"""
+cluster_kernel.py
+Module for sklearn-free k-means cluster assignment at serving time.
+"""
+
+import numpy as np
+
+# Rows processed per block when assigning large batches
+ASSIGNMENT_CHUNK_SIZE = 4096
+
+
+class ClusterAssigner:
+    """Scale points and assign them to the nearest fitted k-means centroid."""
+
+    def __init__(self, cluster_centers, scaler_mean, scaler_scale):
+        """
+        Initialize the kernel from fitted parameters.
+
+        Args:
+            cluster_centers (np.ndarray): Centroids in scaled feature space.
+            scaler_mean (np.ndarray): StandardScaler mean_ per feature.
+            scaler_scale (np.ndarray): StandardScaler scale_ per feature.
+        """
+        self.cluster_centers = np.ascontiguousarray(cluster_centers, dtype=np.float64)
+        self.scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_scale = np.asarray(scaler_scale, dtype=np.float64)
+
+        # Same squared norms sklearn precomputes for its distance kernel
+        self.centers_squared_norms = np.einsum(
+            "ij,ij->i", self.cluster_centers, self.cluster_centers
+        )
+
+    @classmethod
+    def from_estimators(cls, scaler, kmeans):
+        """
+        Build the kernel from a fitted StandardScaler and KMeans.
+
+        Args:
+            scaler (StandardScaler): Fitted scaler.
+            kmeans (KMeans): Fitted k-means model.
+
+        Returns:
+            ClusterAssigner: Kernel holding copies of the fitted arrays.
+        """
+        return cls(kmeans.cluster_centers_, scaler.mean_, scaler.scale_)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the fitted arrays."""
+        return sum(array.nbytes for array in vars(self).values())
+
+    def transform(self, X):
+        """
+        Standardize raw feature rows like StandardScaler.transform.
+
+        Args:
+            X (array-like): Raw feature rows, shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Scaled float64 feature rows.
+        """
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        X -= self.scaler_mean
+        X /= self.scaler_scale
+        return X
+
+    def predict(self, X_scaled):
+        """
+        Assign already scaled rows to their nearest centroid.
+
+        Distances are computed as ||c||^2 - 2 x.c (the row norm of x does not
+        change the argmin), which is the expression KMeans.predict evaluates, so
+        labels match it exactly, including ties going to the lowest cluster.
+
+        Args:
+            X_scaled (array-like): Scaled feature rows.
+
+        Returns:
+            np.ndarray: Cluster label per row.
+        """
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        labels = np.empty(len(X_scaled), dtype=np.int32)
+        for start in range(0, len(X_scaled), ASSIGNMENT_CHUNK_SIZE):
+            chunk = X_scaled[start : start + ASSIGNMENT_CHUNK_SIZE]
+            distances = chunk @ self.cluster_centers.T
+            distances *= -2.0
+            distances += self.centers_squared_norms
+            labels[start : start + len(chunk)] = distances.argmin(axis=1)
+        return labels
+
+    def assign(self, X):
+        """
+        Scale raw feature rows and assign each to a cluster.
+
+        Args:
+            X (array-like): Raw feature rows, shape (n_samples, n_features).
+
+        Returns:
+            np.ndarray: Cluster label per row.
+        """
+        return self.predict(self.transform(X))
+
+    def assign_one(self, *features):
+        """
+        Assign a single raw point with minimal per-call overhead.
+
+        Args:
+            *features (float): Raw feature values in training column order.
+
+        Returns:
+            int: Cluster label.
+        """
+        point = (np.array(features, dtype=np.float64) - self.scaler_mean) / (
+            self.scaler_scale
+        )
+        distances = self.cluster_centers @ point
+        distances *= -2.0
+        distances += self.centers_squared_norms
+        return int(distances.argmin())
+
+
+def count_assignment_mismatches(assigner, kmeans, X_scaled):
+    """
+    Count rows where the kernel disagrees with KMeans.predict.
+
+    Args:
+        assigner (ClusterAssigner): Serving kernel.
+        kmeans (KMeans): Fitted k-means model the kernel was built from.
+        X_scaled (array-like): Scaled feature rows to compare on.
+
+    Returns:
+        int: Number of rows with different labels.
+    """
+    X_scaled = np.asarray(X_scaled, dtype=np.float64)
+    return int((assigner.predict(X_scaled) != kmeans.predict(X_scaled)).sum())
@@ -16,6 +16,7 @@ else:
 
 DATA_DIR = PROJECT_DIR / "data"
 MODELS_DIR = PROJECT_DIR / "models"
+PROFILES_DIR = PROJECT_DIR / "profiles"
 
 # Data filenames
 RAW_RECIPES_FILENAME = "RAW_recipes.csv"
@@ -0,0 +1,306 @@
+"""
+dedup.py
+Module for near-duplicate recipe detection with MinHash and locality-sensitive hashing.
+
+Each recipe is treated as a set of features: its ingredients and the word
+shingles (runs of SHINGLE_SIZE consecutive words) of its steps. A MinHash
+signature keeps the minimum of N_PERMUTATIONS hash functions over the set, and
+two signatures agree in a position with probability equal to the Jaccard
+similarity of the sets.
+
+Signatures are cut into LSH_BANDS bands. Recipes with an identical band land in
+the same bucket and become candidates, so only candidate pairs are compared
+instead of all n^2 pairs. Candidates whose estimated similarity reaches the
+threshold are joined into groups (connected components), and each group keeps
+its highest-rated recipe.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from .features import rating_stats
+from .fuzzy_search import TOKEN_PATTERN
+from .ingredient_stats import explode_ingredients
+
+# Hash functions per MinHash signature
+N_PERMUTATIONS = 64
+
+# Bands the signature is cut into for LSH; with 4 rows per band, pairs at 0.8
+# similarity become candidates with probability > 0.999 and pairs at 0.3 with
+# probability < 0.15
+LSH_BANDS = 16
+
+# Consecutive step words per shingle
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity at which two recipes are duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+# Recipes whose features are hashed at a time (bounds the hash matrix memory)
+SIGNATURE_CHUNK_SIZE = 512
+
+# Candidate pairs whose signatures are compared at a time
+PAIR_CHUNK_SIZE = 65536
+
+# LSH buckets larger than this are chained instead of compared pairwise
+MAX_BUCKET_SIZE = 32
+
+# Odd multipliers mixing consecutive word hashes into one shingle hash
+SHINGLE_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64
+)
+
+
+def _explode_words(steps):
+    """Split stringified step lists into lowercase words, indexed by position."""
+    values = pd.Series(np.asarray(steps, dtype=object)).str.lower()
+    return values.str.findall(TOKEN_PATTERN).explode().dropna()
+
+
+def _shingle_hashes(words):
+    """
+    Hash each run of SHINGLE_SIZE consecutive words of the same recipe.
+
+    Args:
+        words (pd.Series): Words indexed by the position of their recipe.
+
+    Returns:
+        tuple: (positions, hashes) of the shingles, as int64 and uint64 arrays.
+    """
+    positions = words.index.to_numpy(dtype=np.int64)
+    hashes = pd.util.hash_array(words.to_numpy(dtype=object))
+    n_shingles = len(hashes) - SHINGLE_SIZE + 1
+    if n_shingles < 1:
+        return np.empty(0, np.int64), np.empty(0, np.uint64)
+
+    # A shingle must not span two recipes
+    same_recipe = positions[:n_shingles] == positions[SHINGLE_SIZE - 1 :]
+    mixed = np.zeros(n_shingles, dtype=np.uint64)
+    for offset, multiplier in enumerate(SHINGLE_MULTIPLIERS[:SHINGLE_SIZE]):
+        mixed = mixed * multiplier + hashes[offset : offset + n_shingles]
+    return positions[:n_shingles][same_recipe], mixed[same_recipe]
+
+
+def minhash_signatures(
+    ingredients,
+    steps,
+    n_permutations=N_PERMUTATIONS,
+    chunk_size=SIGNATURE_CHUNK_SIZE,
+    random_state=42,
+):
+    """
+    Compute the MinHash signature of every recipe's ingredients and step shingles.
+
+    Args:
+        ingredients (pd.Series): Stringified ingredient lists, one per recipe.
+        steps (pd.Series): Stringified step lists, one per recipe.
+        n_permutations (int): Hash functions per signature.
+        chunk_size (int): Recipes hashed at a time.
+        random_state (int): Seed of the hash functions.
+
+    Returns:
+        tuple: (signatures, has_features) where signatures is a uint32 array
+            of shape (n_recipes, n_permutations) and has_features marks the
+            recipes with at least one ingredient or shingle.
+    """
+    ingredients = pd.Series(np.asarray(ingredients, dtype=object))
+    steps = pd.Series(np.asarray(steps, dtype=object))
+    if len(ingredients) != len(steps):
+        raise ValueError("Expected one step list per ingredient list")
+
+    # Multiply-shift hash functions: h(x) = (a * x + b) >> 32 with odd a
+    rng = np.random.default_rng(random_state)
+    multipliers = rng.integers(1, 2**63, n_permutations, dtype=np.uint64) | 1
+    increments = rng.integers(0, 2**63, n_permutations, dtype=np.uint64)
+
+    n_recipes = len(ingredients)
+    signatures = np.full(
+        (n_recipes, n_permutations), np.iinfo(np.uint32).max, dtype=np.uint32
+    )
+    has_features = np.zeros(n_recipes, dtype=bool)
+    for start in range(0, n_recipes, chunk_size):
+        stop = min(start + chunk_size, n_recipes)
+        names = explode_ingredients(ingredients.iloc[start:stop])
+        shingle_positions, shingles = _shingle_hashes(
+            _explode_words(steps.iloc[start:stop])
+        )
+        positions = np.concatenate(
+            [names.index.to_numpy(dtype=np.int64), shingle_positions]
+        )
+        features = np.concatenate(
+            [pd.util.hash_array(names.to_numpy(dtype=object)), shingles]
+        )
+        if len(features) == 0:
+            continue
+
+        # Minimum hash of each recipe's features, per hash function (one row
+        # per function, so the reduction runs along contiguous memory)
+        order = np.argsort(positions, kind="stable")
+        positions = positions[order]
+        hashed = (
+            (multipliers[:, None] * features[order] + increments[:, None])
+            >> np.uint64(32)
+        ).astype(np.uint32)
+        firsts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        rows = start + positions[firsts]
+        signatures[rows] = np.minimum.reduceat(hashed, firsts, axis=1).T
+        has_features[rows] = True
+
+    return signatures, has_features
+
+
+def _signature_keys(signatures):
+    """Mix each row of uint32 values into one uint64 key."""
+    keys = np.zeros(len(signatures), dtype=np.uint64)
+    multipliers = np.resize(SHINGLE_MULTIPLIERS, signatures.shape[1])
+    for column, multiplier in zip(signatures.T, multipliers):
+        keys = keys * multiplier + column
+    return keys
+
+
+def candidate_pairs(signatures, has_features, n_bands=LSH_BANDS):
+    """
+    Find candidate duplicate pairs by banding the signatures.
+
+    Recipes with an identical band share a bucket. Buckets of up to
+    MAX_BUCKET_SIZE recipes yield all their pairs; in larger buckets (common
+    boilerplate rather than duplicates) each recipe is only paired with the
+    next one in signature order, so identical recipes are still paired and the
+    number of pairs stays linear.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures from minhash_signatures.
+        has_features (np.ndarray): Recipes that take part in the search.
+        n_bands (int): Bands per signature; must divide the signature length.
+
+    Returns:
+        np.ndarray: Distinct (first, second) position pairs of shape (n, 2).
+
+    Raises:
+        ValueError: If n_bands does not divide the signature length
+    """
+    if not isinstance(n_bands, int) or n_bands < 1:
+        raise ValueError("Number of bands must be a positive integer")
+    if signatures.shape[1] % n_bands:
+        raise ValueError(
+            f"{n_bands} bands do not divide signatures of length {signatures.shape[1]}"
+        )
+
+    candidates = np.flatnonzero(has_features)
+    signatures = signatures[candidates]
+    full_keys = _signature_keys(signatures)
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for band in np.split(signatures, n_bands, axis=1):
+        # A rare key collision only adds a candidate, which the similarity
+        # check then rejects
+        keys = _signature_keys(band)
+        order = np.lexsort((full_keys, keys))
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(order)])
+
+        # Partners of each sorted recipe: the rest of its bucket, or only the
+        # next recipe in an oversized bucket
+        offsets = np.arange(len(order)) - np.repeat(starts, sizes)
+        remaining = np.repeat(sizes, sizes) - offsets - 1
+        partners = np.where(
+            np.repeat(sizes, sizes) > MAX_BUCKET_SIZE,
+            np.minimum(remaining, 1),
+            remaining,
+        )
+        left = np.repeat(np.arange(len(order)), partners)
+        first_pairs = np.cumsum(partners) - partners
+        right = left + 1 + np.arange(len(left)) - np.repeat(first_pairs, partners)
+        pairs.append(
+            np.sort(
+                np.column_stack([candidates[order[left]], candidates[order[right]]]),
+                axis=1,
+            )
+        )
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def duplicate_groups(
+    signatures, has_features, threshold=DUPLICATE_THRESHOLD, n_bands=LSH_BANDS
+):
+    """
+    Group near-duplicate recipes.
+
+    Groups are transitive: if A duplicates B and B duplicates C, all three
+    share a group even if A and C are less similar than the threshold.
+
+    Args:
+        signatures (np.ndarray): MinHash signatures from minhash_signatures.
+        has_features (np.ndarray): Recipes that take part in the search.
+        threshold (float): Estimated Jaccard similarity of duplicates.
+        n_bands (int): LSH bands per signature.
+
+    Returns:
+        np.ndarray: Group label per recipe (recipes without duplicates have a
+            group of their own).
+
+    Raises:
+        ValueError: If the threshold is not in (0, 1]
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    if not 0 < threshold <= 1:
+        raise ValueError("Duplicate threshold must be in (0, 1]")
+
+    pairs = candidate_pairs(signatures, has_features, n_bands)
+    similarity = np.empty(len(pairs))
+    for start in range(0, len(pairs), PAIR_CHUNK_SIZE):
+        chunk = pairs[start : start + PAIR_CHUNK_SIZE]
+        similarity[start : start + len(chunk)] = np.mean(
+            signatures[chunk[:, 0]] == signatures[chunk[:, 1]], axis=1
+        )
+    duplicates = pairs[similarity >= threshold]
+
+    n_recipes = len(signatures)
+    graph = sparse.csr_matrix(
+        (np.ones(len(duplicates), dtype=np.int8), (duplicates[:, 0], duplicates[:, 1])),
+        shape=(n_recipes, n_recipes),
+    )
+    return connected_components(graph, directed=False)[1]
+
+
+def deduplicate_recipes(recipes, interactions, threshold=DUPLICATE_THRESHOLD):
+    """
+    Collapse near-duplicate recipes to their highest-rated representative.
+
+    Recipes are compared on their ingredients and step shingles. Within a
+    group the recipe with the highest average rating is kept (ties go to the
+    most rated, then the first listed).
+
+    Args:
+        recipes (DataFrame): Recipes with id, ingredients and steps columns.
+        interactions (DataFrame): User interactions with recipe_id and rating.
+        threshold (float): Estimated Jaccard similarity of duplicates.
+
+    Returns:
+        DataFrame: The representative recipes, in their original order.
+    """
+    started = time.perf_counter()
+    signatures, has_features = minhash_signatures(
+        recipes["ingredients"], recipes["steps"]
+    )
+    groups = duplicate_groups(signatures, has_features, threshold)
+
+    # Ratings per recipe, computed like select_features does
+    num_interactions, avg_rating = rating_stats(recipes["id"], interactions)
+
+    # Best recipe of each group: sort by group, then rating and popularity
+    order = np.lexsort(
+        (np.arange(len(recipes)), -num_interactions, -avg_rating, groups)
+    )
+    firsts = order[np.r_[True, groups[order][1:] != groups[order][:-1]]]
+    deduplicated = recipes.iloc[np.sort(firsts)]
+
+    print(f"Recipes before deduplication: {len(recipes)}")
+    print(
+        f"Recipes after deduplication: {len(deduplicated)} "
+        f"({len(recipes) - len(deduplicated)} near-duplicates removed "
+        f"in {time.perf_counter() - started:.1f}s)"
+    )
+    return deduplicated
@@ -0,0 +1,248 @@
+"""
+dispatcher.py
+Module for an asyncio query front-end in front of the recipe recommender.
+
+Concurrent identical requests share one computation, distinct recommend queries
+arriving within a short window are answered by one vectorized batch call, and
+all CPU work runs on a bounded thread pool.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# How long the first recommend query of a batch waits for others to join it
+BATCH_WINDOW_SECONDS = 0.002
+
+# Largest number of distinct recommend queries answered by one batch call
+MAX_BATCH_SIZE = 64
+
+# Default number of threads running recommender computations
+DEFAULT_QUERY_WORKERS = 4
+
+
+class QueryDispatcher:
+    """Coalesce and micro-batch recommender queries on an event loop."""
+
+    def __init__(
+        self,
+        recommender,
+        max_workers=DEFAULT_QUERY_WORKERS,
+        batch_window=BATCH_WINDOW_SECONDS,
+        max_batch_size=MAX_BATCH_SIZE,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            recommender (RecipeRecommender): Trained model answering the queries.
+            max_workers (int): Threads available for recommender computations.
+            batch_window (float): Seconds to wait for more recommend queries
+                before running a batch.
+            max_batch_size (int): Run a batch as soon as it has this many queries.
+
+        Raises:
+            ValueError: If a size or the batch window is invalid
+        """
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError("Number of workers must be a positive integer")
+        if not isinstance(max_batch_size, int) or max_batch_size < 1:
+            raise ValueError("Batch size must be a positive integer")
+        if batch_window < 0:
+            raise ValueError("Batch window must be non-negative")
+
+        self.recommender = recommender
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="recipe-dispatcher"
+        )
+        self.loop = None
+
+        self._in_flight = {}  # Request key -> future shared by identical requests
+        self._batches = {}  # n_recommendations -> pending recommend queries
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "computations": 0}
+
+    async def recommend(
+        self, desired_time, desired_complexity, n_recommendations=5, user_id=None
+    ):
+        """
+        Recommend recipes (see RecipeRecommender.recommend_recipes).
+
+        Callers share the returned DataFrame with identical requests, so it
+        must not be modified in place.
+
+        Returns:
+            DataFrame: Top K recipes by ranking score.
+        """
+        # Reject bad input here so one bad query cannot fail a whole batch
+        self.recommender._validate_preferences(desired_time, desired_complexity)
+        self.recommender._validate_ranking(n_recommendations, None, 0.0)
+        self.recommender._validate_user(user_id)
+
+        key = (
+            "recommend",
+            float(desired_time),
+            float(desired_complexity),
+            n_recommendations,
+            None if user_id is None else int(user_id),
+        )
+        return await self._coalesce(key, self._enqueue, key)
+
+    async def search(self, search_query, n_results=10, fuzzy=False):
+        """
+        Search recipes (see RecipeRecommender.search_recipes).
+
+        Returns:
+            DataFrame: Matching recipes sorted by relevance.
+        """
+        if not isinstance(search_query, str) or not search_query.strip():
+            raise ValueError("Search query must be a non-empty string")
+
+        key = ("search", " ".join(search_query.lower().split()), n_results, fuzzy)
+        return await self._coalesce(key, self._run_search, key)
+
+    async def search_with_fuzzy_fallback(self, search_query, n_results=10):
+        """
+        Search for exact matches, retrying typo-tolerantly if there are none.
+
+        Returns:
+            DataFrame: Matching recipes sorted by relevance.
+        """
+        results = await self.search(search_query, n_results)
+        if results.empty:
+            results = await self.search(search_query, n_results, fuzzy=True)
+        return results
+
+    async def _coalesce(self, key, start, *args):
+        """
+        Await the in-flight computation for a key, starting it if needed.
+
+        Args:
+            key (tuple): Normalized request key.
+            start (callable): Function starting the computation and returning
+                a future.
+            *args: Arguments for start.
+        """
+        self.stats["requests"] += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = start(*args)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+
+        # A cancelled caller must not cancel the computation other callers share
+        return await asyncio.shield(future)
+
+    def _run_search(self, key):
+        """Start one search computation on the executor."""
+        _, search_query, n_results, fuzzy = key
+        self.stats["computations"] += 1
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            self.recommender.search_recipes,
+            search_query,
+            n_results,
+            fuzzy,
+        )
+
+    def _enqueue(self, key):
+        """Add a recommend query to its micro-batch and return its future."""
+        loop = asyncio.get_running_loop()
+        _, desired_time, desired_complexity, n_recommendations, user_id = key
+        future = loop.create_future()
+
+        # Only queries asking for the same number of recipes share a batch
+        batch = self._batches.get(n_recommendations)
+        if batch is None:
+            batch = self._batches[n_recommendations] = []
+            loop.call_later(self.batch_window, self._flush, n_recommendations, batch)
+        batch.append(((desired_time, desired_complexity), user_id, future))
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(n_recommendations, batch)
+        return future
+
+    def _flush(self, n_recommendations, batch):
+        """Run a micro-batch (once) and resolve its futures when done."""
+        if self._batches.get(n_recommendations) is not batch:
+            return
+        del self._batches[n_recommendations]
+
+        preferences = [preference for preference, _, _ in batch]
+        user_ids = [user_id for _, user_id, _ in batch]
+        futures = [future for _, _, future in batch]
+        self.stats["batches"] += 1
+        self.stats["computations"] += 1
+
+        computation = asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            self.recommender.recommend_recipes_batch,
+            preferences,
+            n_recommendations,
+            None,
+            0.0,
+            user_ids,
+        )
+        computation.add_done_callback(lambda done: self._resolve_batch(done, futures))
+
+    @staticmethod
+    def _resolve_batch(done, futures):
+        """Hand each query its own result, or the batch error to every query."""
+        try:
+            results = done.result()
+        except (Exception, asyncio.CancelledError) as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    def start(self):
+        """
+        Run the dispatcher on its own event loop in a daemon thread.
+
+        Used by synchronous callers such as the Streamlit app, which then submit
+        queries with submit().
+
+        Returns:
+            QueryDispatcher: self, for chaining.
+        """
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self.loop.run_forever,
+                name="recipe-dispatcher-loop",
+                daemon=True,
+            ).start()
+        return self
+
+    def submit(self, query, *args):
+        """
+        Schedule a query from another thread on the dispatcher's loop.
+
+        Args:
+            query (callable): Coroutine method, e.g. dispatcher.recommend.
+            *args: Arguments for the query.
+
+        Returns:
+            concurrent.futures.Future: Future holding the query result.
+
+        Raises:
+            ValueError: If start() has not been called
+        """
+        if self.loop is None:
+            raise ValueError("Dispatcher loop is not running; call start() first.")
+        return asyncio.run_coroutine_threadsafe(query(*args), self.loop)
+
+    def close(self):
+        """Stop the background loop (if any) and the worker threads."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
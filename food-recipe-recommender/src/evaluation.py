@@ -0,0 +1,184 @@
+"""
+evaluation.py
+Module for parallel, reproducible cross-validation and clustering sweeps.
+"""
+
+import time
+from functools import partial
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.cluster import KMeans
+from sklearn.metrics import f1_score, silhouette_score
+from sklearn.model_selection import KFold, StratifiedKFold
+from .thread_budget import worker_thread_limit
+
+# Default fold metric; macro averaging also supports the multi-class cluster targets
+DEFAULT_METRIC = partial(f1_score, average="macro")
+
+
+def _fit_and_score(name, model, X, y, train_idx, test_idx, metric, fold):
+    """Fit a fresh clone of the model on one fold and time fit and predict."""
+    estimator = clone(model)
+
+    start = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = estimator.predict(X[test_idx])
+    predict_time = time.perf_counter() - start
+
+    return {
+        "model": name,
+        "fold": fold,
+        "score": float(metric(y[test_idx], predictions)),
+        "fit_time": fit_time,
+        "predict_time": predict_time,
+        "n_train": len(train_idx),
+        "n_test": len(test_idx),
+    }
+
+
+def run_cross_validation(
+    models, X, y, cv=5, metric=None, n_jobs=-1, random_state=42, stratify=False
+):
+    """
+    Cross-validate one or more models with folds fanned out across processes.
+
+    Only fold indices are sent per task; joblib memory-maps the shared feature
+    and target arrays, so worker memory stays bounded.
+
+    Args:
+        models: A single estimator or a dict mapping names to estimators.
+        X: Feature set.
+        y: Target labels.
+        cv (int): Number of folds.
+        metric (callable): metric(y_true, y_pred) -> float (default: macro F1).
+        n_jobs (int): Number of worker processes (-1 uses all cores).
+        random_state (int): Seed for the fold shuffling.
+        stratify (bool): Use stratified folds.
+
+    Returns:
+        dict: Per-fold results under "folds" and per-model summaries
+            (scores, mean/std score, mean fit and predict times) under "models".
+    """
+    if not isinstance(models, dict):
+        models = {type(models).__name__: models}
+    if metric is None:
+        metric = DEFAULT_METRIC
+
+    X = np.asarray(X)
+    y = np.asarray(y)
+
+    splitter_cls = StratifiedKFold if stratify else KFold
+    splitter = splitter_cls(n_splits=cv, shuffle=True, random_state=random_state)
+    splits = list(splitter.split(X, y))
+
+    # Workers split the training thread budget instead of each using every core
+    with worker_thread_limit(n_jobs):
+        folds = Parallel(n_jobs=n_jobs, pre_dispatch="2*n_jobs")(
+            delayed(_fit_and_score)(
+                name, model, X, y, train_idx, test_idx, metric, fold
+            )
+            for name, model in models.items()
+            for fold, (train_idx, test_idx) in enumerate(splits)
+        )
+
+    summaries = {}
+    for name in models:
+        model_folds = [result for result in folds if result["model"] == name]
+        scores = np.array([result["score"] for result in model_folds])
+        summaries[name] = {
+            "scores": scores,
+            "mean_score": float(scores.mean()),
+            "std_score": float(scores.std()),
+            "mean_fit_time": float(np.mean([r["fit_time"] for r in model_folds])),
+            "mean_predict_time": float(
+                np.mean([r["predict_time"] for r in model_folds])
+            ),
+        }
+
+    return {
+        "cv": cv,
+        "random_state": random_state,
+        "folds": folds,
+        "models": summaries,
+    }
+
+
+def _fit_kmeans(X, k, random_state, silhouette_sample_size):
+    """Fit k-means for one k and collect inertia, silhouette and timings."""
+    kmeans = KMeans(n_clusters=k, random_state=random_state)
+
+    start = time.perf_counter()
+    labels = kmeans.fit_predict(X)
+    fit_time = time.perf_counter() - start
+
+    silhouette = None
+    if silhouette_sample_size != 0:
+        silhouette = float(
+            silhouette_score(
+                X,
+                labels,
+                sample_size=silhouette_sample_size,
+                random_state=random_state,
+            )
+        )
+
+    return {
+        "k": k,
+        "inertia": float(kmeans.inertia_),
+        "silhouette": silhouette,
+        "fit_time": fit_time,
+    }
+
+
+def sweep_kmeans(X, k_values, random_state=42, n_jobs=-1, silhouette_sample_size=None):
+    """
+    Fit k-means for several k values in parallel.
+
+    Args:
+        X: Feature set to cluster.
+        k_values (iterable): Numbers of clusters to try.
+        random_state (int): Seed for every k-means fit and silhouette sample.
+        n_jobs (int): Number of worker processes (-1 uses all cores).
+        silhouette_sample_size (int): Rows sampled for the silhouette score
+            (None uses all rows, 0 skips the silhouette score).
+
+    Returns:
+        list: One dict per k with "k", "inertia", "silhouette" and "fit_time".
+    """
+    X = np.asarray(X)
+    with worker_thread_limit(n_jobs):
+        return Parallel(n_jobs=n_jobs, pre_dispatch="2*n_jobs")(
+            delayed(_fit_kmeans)(X, k, random_state, silhouette_sample_size)
+            for k in k_values
+        )
+
+
+def gate_report(report, min_score, model=None):
+    """
+    Fail a training pipeline when cross-validation scores are too low.
+
+    Args:
+        report (dict): Output of run_cross_validation.
+        min_score (float): Minimum acceptable mean score.
+        model (str): Only gate on this model (default: every model).
+
+    Returns:
+        bool: True if every gated model passes.
+
+    Raises:
+        ValueError: If a gated model's mean score is below min_score
+    """
+    names = [model] if model is not None else list(report["models"])
+    failing = {
+        name: report["models"][name]["mean_score"]
+        for name in names
+        if report["models"][name]["mean_score"] < min_score
+    }
+    if failing:
+        raise ValueError(f"Models below minimum score {min_score}: {failing}")
+
+    return True
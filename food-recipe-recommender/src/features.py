@@ -1,5 +1,49 @@
 """Module Imports"""
 
+import numpy as np
+import pandas as pd
+
+
+def rating_stats(recipe_ids, interactions):
+    """
+    Count the interactions and average the ratings of each recipe.
+
+    Recipe ids may repeat; every row with the same id gets the same values,
+    as a merge on the id would give.
+
+    Args:
+        recipe_ids: Recipe id of each recipe row.
+        interactions: DataFrame with recipe_id and rating columns.
+    Returns:
+        tuple: (num_interactions, avg_rating) arrays aligned with recipe_ids;
+            recipes without interactions get 0 for both.
+    """
+    # Each interaction is mapped to its recipe's distinct id and counted there
+    id_codes, unique_ids = pd.factorize(np.asarray(recipe_ids))
+    positions = pd.Index(unique_ids).get_indexer(interactions["recipe_id"])
+    rated = positions >= 0
+    id_interactions = np.bincount(positions[rated], minlength=len(unique_ids))
+    rating_sums = np.bincount(
+        positions[rated],
+        weights=interactions["rating"].to_numpy()[rated],
+        minlength=len(unique_ids),
+    )
+    id_ratings = np.divide(
+        rating_sums,
+        id_interactions,
+        out=np.zeros(len(unique_ids)),
+        where=id_interactions > 0,
+    )
+
+    # Spread the per-id values back to the recipe rows (missing ids get 0)
+    has_id = id_codes >= 0
+    num_interactions = np.zeros(len(id_codes), dtype=id_interactions.dtype)
+    avg_rating = np.zeros(len(id_codes))
+    num_interactions[has_id] = id_interactions[id_codes[has_id]]
+    avg_rating[has_id] = id_ratings[id_codes[has_id]]
+    return num_interactions, avg_rating
+
+
 def select_features(recipes, interactions):
     """
     Select the most important features for modeling.
@@ -13,37 +57,20 @@ def select_features(recipes, interactions):
     # Feature Engineering
     #################################
 
-    # Compute average rating per recipe
-    avg_rating_per_recipe = (
-        interactions.groupby("recipe_id")["rating"].mean().rename("avg_rating")
-    )
-
-    # Compute number of interactions per recipe (popularity proxy)
-    num_interactions_per_recipe = (
-        interactions.groupby("recipe_id").size().rename("num_interactions")
-    )
-
-    # Merge the computed features back into the recipes dataset
-    recipes = recipes.merge(
-        avg_rating_per_recipe, left_on="id", right_index=True, how="left"
-    )
-    recipes = recipes.merge(
-        num_interactions_per_recipe, left_on="id", right_index=True, how="left"
-    )
-
-    # Fill missing values (some recipes may not have interactions)
-    recipes["avg_rating"].fillna(0)
-    recipes["num_interactions"].fillna(0)
+    # Compute the number of interactions (popularity proxy) and the average
+    # rating per recipe in one pass that also joins them to the recipes
+    # (recipes without interactions get a rating of 0)
+    num_interactions, avg_rating = rating_stats(recipes["id"], interactions)
 
     # Define a complexity score (example: combination of steps and ingredients)
-    recipes["complexity_score"] = recipes["n_steps"] * recipes["n_ingredients"]
+    complexity_score = (
+        recipes["n_steps"].to_numpy() * recipes["n_ingredients"].to_numpy()
+    )
 
-    # Filter out recipes with a complexity score over 100 and rating below 4
-    recipes = recipes[
-        (recipes["complexity_score"] <= 100)
-        & (recipes["avg_rating"] >= 4)
-        & (recipes["num_interactions"] >= 3)
-    ]
+    # Filter out recipes with a complexity score over 100 and rating below 4,
+    # using only the numeric columns, so the wide text columns are copied once
+    # and only for the kept recipes
+    keep = (complexity_score <= 100) & (avg_rating >= 4) & (num_interactions >= 3)
 
     #################################
     # Feature Selection
@@ -51,14 +78,32 @@ def select_features(recipes, interactions):
 
     # Select the most important features
     selected_columns = [
+        "id",
         "name",
         "avg_rating",
+        "num_interactions",
         "minutes",
         "complexity_score",
         "ingredients",
         "steps",
     ]
-    selected_features = recipes[selected_columns]
+    engineered = {
+        "avg_rating": avg_rating[keep],
+        "num_interactions": num_interactions[keep],
+        "complexity_score": complexity_score[keep],
+    }
+    selected_features = pd.DataFrame(
+        {
+            column: (
+                engineered[column]
+                if column in engineered
+                else recipes[column].to_numpy()[keep]
+            )
+            for column in selected_columns
+        },
+        index=recipes.index[keep],
+        copy=False,
+    )
 
     # Further feature selection logic can be added here
 
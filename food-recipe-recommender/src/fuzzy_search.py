@@ -0,0 +1,325 @@
+"""
+fuzzy_search.py
+Module for typo-tolerant recipe search with a character trigram index.
+
+Recipe names and ingredient lists are split into word tokens. Each distinct
+token is indexed by its padded character trigrams, so a misspelled query word
+("chiken") finds candidate tokens ("chicken") that share enough trigrams. The
+candidates are verified with a bounded edit distance, and recipes are scored
+with the same name-over-ingredient weighting as the exact search.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+from .ingredient_stats import factorize_tokens
+from .storage import structure_nbytes
+
+# Word tokens in recipe names, ingredient lists and queries
+TOKEN_PATTERN = r"([^\W_]+)"
+
+# Relevance of a matched query word in each field (names count double)
+NAME_WEIGHT = 2.0
+INGREDIENT_WEIGHT = 1.0
+
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text (str): Text to split.
+
+    Returns:
+        list: Word tokens in order of appearance.
+    """
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def trigrams(term):
+    """
+    Return the distinct character trigrams of a space-padded term.
+
+    Args:
+        term (str): Token to split.
+
+    Returns:
+        set: Trigrams, e.g. {" ch", "chi", "hic", ...} for "chicken".
+    """
+    padded = f" {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits_for(word):
+    """
+    Return the number of typos tolerated in a query word.
+
+    Args:
+        word (str): Query token.
+
+    Returns:
+        int: 0 for words under 4 characters, 1 under 8 and 2 otherwise.
+    """
+    if len(word) < 4:
+        return 0
+    if len(word) < 8:
+        return 1
+    return 2
+
+
+def bounded_levenshtein(a, b, max_distance):
+    """
+    Compute the edit distance between two strings, giving up past a bound.
+
+    Only a diagonal band of width 2 * max_distance + 1 is evaluated and the
+    computation stops as soon as every cell in a row exceeds the bound.
+
+    Args:
+        a (str): First string.
+        b (str): Second string.
+        max_distance (int): Largest distance of interest.
+
+    Returns:
+        int: The distance, or max_distance + 1 if it is larger than the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    too_far = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost, too_far
+            )
+        if min(current[low - 1 : high + 1]) > max_distance:
+            return too_far
+        previous = current
+
+    return previous[len(b)]
+
+
+def _postings(positions, term_ids, n_terms, n_recipes):
+    """
+    Build CSR posting lists from (term, recipe position) pairs.
+
+    Args:
+        positions (np.ndarray): Recipe position of each token.
+        term_ids (np.ndarray): Vocabulary id of each token.
+        n_terms (int): Vocabulary size.
+        n_recipes (int): Number of recipes.
+
+    Returns:
+        tuple: (offsets, positions) where positions[offsets[t]:offsets[t + 1]]
+            are the sorted positions of the recipes containing term t.
+    """
+    stride = max(n_recipes, 1)
+    pairs = np.unique(term_ids.astype(np.int64) * stride + positions)
+    terms = pairs // stride
+    offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(terms, minlength=n_terms))
+    return offsets, (pairs % stride).astype(np.int32)
+
+
+def _explode_tokens(values):
+    """Tokenize a text column into one token per row, indexed by position."""
+    values = pd.Series(np.asarray(values, dtype=object)).str.lower()
+    return values.str.findall(TOKEN_PATTERN).explode().dropna()
+
+
+class TrigramIndex:
+    """Trigram index over recipe name and ingredient tokens."""
+
+    def __init__(self, names, ingredients):
+        """
+        Build the index.
+
+        Args:
+            names (pd.Series): Recipe names, one per recipe.
+            ingredients (pd.Series): Stringified ingredient lists, one per recipe.
+        """
+        self.n_recipes = len(names)
+
+        # One vocabulary shared by both fields, built chunk by chunk
+        name_positions, name_codes, vocabulary = factorize_tokens(
+            names, _explode_tokens
+        )
+        ingredient_positions, ingredient_codes, vocabulary = factorize_tokens(
+            ingredients, _explode_tokens, vocabulary
+        )
+        self.vocabulary = vocabulary
+        self.term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        self.term_lengths = np.fromiter(
+            (len(term) for term in self.vocabulary), dtype=np.int32
+        )
+
+        n_terms = len(self.vocabulary)
+        self.name_offsets, self.name_postings = _postings(
+            name_positions, name_codes, n_terms, self.n_recipes
+        )
+        self.ingredient_offsets, self.ingredient_postings = _postings(
+            ingredient_positions, ingredient_codes, n_terms, self.n_recipes
+        )
+
+        # Trigram -> sorted term ids, in CSR form
+        gram_ids = {}
+        gram_codes = []
+        gram_terms = []
+        for term_id, term in enumerate(self.vocabulary):
+            for gram in trigrams(term):
+                gram_codes.append(gram_ids.setdefault(gram, len(gram_ids)))
+                gram_terms.append(term_id)
+        gram_codes = np.asarray(gram_codes, dtype=np.int64)
+        order = np.argsort(gram_codes, kind="stable")
+        self.gram_ids = gram_ids
+        self.gram_terms = np.asarray(gram_terms, dtype=np.int32)[order]
+        self.gram_offsets = np.zeros(len(gram_ids) + 1, dtype=np.int64)
+        self.gram_offsets[1:] = np.cumsum(
+            np.bincount(gram_codes, minlength=len(gram_ids))
+        )
+
+    @property
+    def nbytes(self):
+        """Bytes held by the index, including its term and trigram dicts."""
+        return structure_nbytes(vars(self))
+
+    def match_terms(self, word):
+        """
+        Find vocabulary tokens within the word's edit budget.
+
+        Each edit changes at most three trigrams, so a token within max_edits
+        shares at least len(trigrams) - 3 * max_edits of them with the word;
+        only tokens passing that count and the length filter are verified.
+
+        Args:
+            word (str): Lowercase query token.
+
+        Returns:
+            tuple: (term ids, similarities) with similarity 1.0 for an exact
+                match and lower values for each extra edit.
+        """
+        max_edits = max_edits_for(word)
+        if max_edits == 0:
+            term_id = self.term_ids.get(word)
+            if term_id is None:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            return np.array([term_id]), np.ones(1)
+
+        grams = [
+            self.gram_ids[gram] for gram in trigrams(word) if gram in self.gram_ids
+        ]
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        shared = np.bincount(
+            np.concatenate(
+                [
+                    self.gram_terms[self.gram_offsets[g] : self.gram_offsets[g + 1]]
+                    for g in grams
+                ]
+            ),
+            minlength=len(self.vocabulary),
+        )
+        min_shared = max(1, len(trigrams(word)) - 3 * max_edits)
+        candidates = np.flatnonzero(
+            (shared >= min_shared)
+            & (np.abs(self.term_lengths - len(word)) <= max_edits)
+        )
+
+        distances = np.array(
+            [
+                bounded_levenshtein(word, self.vocabulary[term_id], max_edits)
+                for term_id in candidates
+            ],
+            dtype=np.int64,
+        )
+        keep = distances <= max_edits
+        return candidates[keep], 1.0 - distances[keep] / (max_edits + 1)
+
+    def word_postings(self, word, fuzzy=False):
+        """
+        Return the posting lists of every token a query word matches.
+
+        Args:
+            word (str): Lowercase query token.
+            fuzzy (bool): Also match tokens within the word's typo budget.
+
+        Returns:
+            list: Sorted arrays of recipe positions (name and ingredient
+                postings of each matched token); their union is the set of
+                recipes containing the word.
+        """
+        if fuzzy:
+            term_ids, _ = self.match_terms(word)
+        else:
+            term_id = self.term_ids.get(word)
+            term_ids = [] if term_id is None else [term_id]
+
+        lists = []
+        for term_id in term_ids:
+            lists.append(
+                self.name_postings[
+                    self.name_offsets[term_id] : self.name_offsets[term_id + 1]
+                ]
+            )
+            lists.append(
+                self.ingredient_postings[
+                    self.ingredient_offsets[term_id] : self.ingredient_offsets[
+                        term_id + 1
+                    ]
+                ]
+            )
+        return lists
+
+    def _field_scores(self, term_ids, similarities, offsets, postings):
+        """Best similarity of any matched term per recipe in one field."""
+        scores = np.zeros(self.n_recipes)
+        for term_id, similarity in zip(term_ids, similarities):
+            recipes = postings[offsets[term_id] : offsets[term_id + 1]]
+            scores[recipes] = np.maximum(scores[recipes], similarity)
+        return scores
+
+    def search(self, query):
+        """
+        Score every recipe against a possibly misspelled query.
+
+        A recipe matches if every query word matches a token in its name or
+        ingredients. Each word adds NAME_WEIGHT times its name similarity plus
+        INGREDIENT_WEIGHT times its ingredient similarity.
+
+        Args:
+            query (str): Search query.
+
+        Returns:
+            tuple: (positions, relevance) of the matching recipes, in position
+                order.
+        """
+        words = tokenize(query)
+        if not words:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        relevance = np.zeros(self.n_recipes)
+        matched = np.ones(self.n_recipes, dtype=bool)
+        for word in dict.fromkeys(words):
+            term_ids, similarities = self.match_terms(word)
+            name_scores = self._field_scores(
+                term_ids, similarities, self.name_offsets, self.name_postings
+            )
+            ingredient_scores = self._field_scores(
+                term_ids,
+                similarities,
+                self.ingredient_offsets,
+                self.ingredient_postings,
+            )
+            relevance += (
+                NAME_WEIGHT * name_scores + INGREDIENT_WEIGHT * ingredient_scores
+            )
+            matched &= (name_scores > 0) | (ingredient_scores > 0)
+
+        positions = np.flatnonzero(matched)
+        return positions, relevance[positions]
@@ -0,0 +1,170 @@
+"""
+ingredient_stats.py
+Module for vectorized ingredient frequency and co-occurrence statistics.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Matches each quoted item of a stringified Python list, e.g. "['salt', \"cook's salt\"]"
+INGREDIENT_PATTERN = r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\""
+
+# Recipes parsed at a time by factorize_tokens, which bounds how many token
+# strings are alive at once while a model is built
+TOKEN_CHUNK_SIZE = 2000
+
+
+def explode_ingredients(ingredients):
+    """
+    Parse stringified ingredient lists into one entry per (recipe, ingredient).
+
+    Args:
+        ingredients (pd.Series): List literals such as "['salt', 'eggs']".
+
+    Returns:
+        pd.Series: Ingredient names indexed by the position of their recipe.
+    """
+    values = pd.Series(np.asarray(ingredients, dtype=object))
+    matches = values.str.extractall(INGREDIENT_PATTERN)
+    tokens = matches[0].fillna(matches[1])
+    return pd.Series(
+        tokens.to_numpy(dtype=object),
+        index=matches.index.get_level_values(0).to_numpy(),
+    )
+
+
+def factorize_tokens(values, explode, vocabulary=None, chunk_size=TOKEN_CHUNK_SIZE):
+    """
+    Parse a text column into (recipe position, token code) pairs, chunk by chunk.
+
+    The result equals pd.factorize over all of explode(values) (codes follow
+    first appearance), but only one chunk's token strings exist at a time.
+
+    Args:
+        values (pd.Series): Text per recipe, e.g. stringified ingredient lists.
+        explode (callable): Maps a Series of texts to its tokens, indexed by the
+            position of their text (e.g. explode_ingredients).
+        vocabulary (np.ndarray): Vocabulary to extend; its tokens keep their codes.
+        chunk_size (int): Texts parsed at a time.
+
+    Returns:
+        tuple: (positions, codes, vocabulary) with int64 positions and codes
+            and the vocabulary as an object array.
+    """
+    values = pd.Series(values)
+    terms = pd.Index([] if vocabulary is None else vocabulary, dtype=object)
+    positions, codes = [], []
+    for start in range(0, len(values), chunk_size):
+        chunk = values.iloc[start : start + chunk_size].to_numpy(dtype=object)
+        tokens = explode(pd.Series(chunk))
+        words = tokens.to_numpy(dtype=object)
+
+        chunk_codes = terms.get_indexer(words)
+        unseen = chunk_codes < 0
+        if unseen.any():
+            terms = terms.append(pd.Index(pd.unique(words[unseen]), dtype=object))
+            chunk_codes[unseen] = terms.get_indexer(words[unseen])
+
+        positions.append(tokens.index.to_numpy(dtype=np.int64) + start)
+        codes.append(chunk_codes.astype(np.int64))
+
+    return (
+        np.concatenate(positions or [np.empty(0, np.int64)]),
+        np.concatenate(codes or [np.empty(0, np.int64)]),
+        np.asarray(terms, dtype=object),
+    )
+
+
+def compute_ingredient_stats(ingredients, clusters=None, top_n=50):
+    """
+    Compute global and per-cluster ingredient frequencies and co-occurrence counts.
+
+    Args:
+        ingredients (pd.Series): Stringified ingredient lists, one per recipe.
+        clusters (array-like): Optional cluster label per recipe.
+        top_n (int): Number of most frequent ingredients to compute co-occurrence for.
+
+    Returns:
+        dict: Vocabulary sorted by frequency with aligned global counts, per-cluster
+            counts and a top_n x top_n co-occurrence matrix.
+    """
+    from scipy import sparse
+
+    recipe_positions, codes, vocabulary = factorize_tokens(
+        ingredients, explode_ingredients
+    )
+
+    # Relabel codes so the vocabulary is ordered by descending frequency
+    counts = np.bincount(codes, minlength=len(vocabulary))
+    order = np.argsort(-counts, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    codes = rank[codes]
+    vocabulary = vocabulary[order]
+    counts = counts[order]
+
+    stats = {
+        "vocabulary": vocabulary,
+        "counts": counts,
+        "n_recipes": len(ingredients),
+        "cluster_ids": None,
+        "cluster_counts": None,
+    }
+
+    if clusters is not None:
+        cluster_codes, cluster_ids = pd.factorize(np.asarray(clusters), sort=True)
+        n_vocab = len(vocabulary)
+        flat = cluster_codes[recipe_positions].astype(np.int64) * n_vocab + codes
+        stats["cluster_ids"] = np.asarray(cluster_ids)
+        stats["cluster_counts"] = np.bincount(
+            flat, minlength=len(cluster_ids) * n_vocab
+        ).reshape(len(cluster_ids), n_vocab)
+
+    # Co-occurrence over the most frequent ingredients via a sparse incidence matrix
+    top_n = min(top_n, len(vocabulary))
+    in_top = codes < top_n
+    incidence = sparse.csr_matrix(
+        (
+            np.ones(in_top.sum(), dtype=np.int32),
+            (recipe_positions[in_top], codes[in_top]),
+        ),
+        shape=(len(ingredients), top_n),
+    )
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    stats["cooccurrence"] = (incidence.T @ incidence).toarray()
+
+    return stats
+
+
+def top_ingredients(stats, top_n=10, cluster=None):
+    """
+    Return the most used ingredients, globally or within one cluster.
+
+    Args:
+        stats (dict): Output of compute_ingredient_stats.
+        top_n (int): Number of ingredients to return.
+        cluster: Optional cluster label to restrict the counts to.
+
+    Returns:
+        list: (ingredient, count) tuples sorted by descending count.
+
+    Raises:
+        ValueError: If per-cluster counts are unavailable or the cluster is unknown
+    """
+    if cluster is None:
+        # Global counts are already sorted by frequency
+        return list(zip(stats["vocabulary"][:top_n], stats["counts"][:top_n]))
+
+    if stats["cluster_counts"] is None:
+        raise ValueError("Ingredient stats were computed without cluster labels")
+
+    matches = np.flatnonzero(stats["cluster_ids"] == cluster)
+    if matches.size == 0:
+        raise ValueError(f"Unknown cluster: {cluster}")
+
+    row = stats["cluster_counts"][matches[0]]
+    top_n = min(top_n, row.size)
+    candidates = np.argpartition(-row, top_n - 1)[:top_n]
+    candidates = candidates[np.argsort(-row[candidates], kind="stable")]
+    return list(zip(stats["vocabulary"][candidates], row[candidates]))
@@ -0,0 +1,159 @@
+"""
+leakage_checks.py
+Module for linear-time train/test leakage and overlap detection.
+"""
+
+import itertools
+import numpy as np
+import pandas as pd
+
+# Columns identifying a recipe; a test recipe found in training by any of them
+# is leakage
+IDENTIFYING_COLUMNS = ["id"]
+
+# Column of recipe names; names are not unique (many recipes are called
+# "chocolate chip cookies"), so shared names are only reported
+NAME_COLUMN = "name"
+
+# Most numeric columns the near-duplicate check probes neighbouring cells for
+# (3 ** columns probes per test row)
+MAX_NEAR_DUPLICATE_COLUMNS = 6
+
+
+def hash_feature_rows(features, tolerance=None):
+    """
+    Hash every feature row to a single uint64.
+
+    Args:
+        features (pd.DataFrame): Feature rows to hash (the index is ignored).
+        tolerance (float): If set, numeric columns are snapped to a grid of this
+            width before hashing, so rows in the same grid cell collide. Rows
+            closer than the tolerance but on either side of a cell boundary do
+            not; check_leakage probes the neighbouring cells to find them.
+
+    Returns:
+        np.ndarray: One uint64 hash per row.
+    """
+    if tolerance is not None:
+        numeric_columns = features.select_dtypes("number").columns
+        features = features.assign(
+            **{
+                col: np.floor(features[col].to_numpy() / tolerance)
+                for col in numeric_columns
+            }
+        )
+
+    return pd.util.hash_pandas_object(features, index=False).to_numpy()
+
+
+def _near_duplicate_rows(train, test, tolerance):
+    """
+    Flag test rows within the tolerance of a training row on every numeric column.
+
+    Each row is snapped to a grid of the tolerance's width, and test rows look
+    up their own cell and every neighbouring cell, so no pair closer than the
+    tolerance is missed (pairs up to twice the tolerance apart may also match).
+
+    Raises:
+        ValueError: If there are more than MAX_NEAR_DUPLICATE_COLUMNS numeric columns
+    """
+    numeric_columns = train.select_dtypes("number").columns
+    if len(numeric_columns) > MAX_NEAR_DUPLICATE_COLUMNS:
+        raise ValueError(
+            f"Near-duplicate check supports at most {MAX_NEAR_DUPLICATE_COLUMNS} "
+            f"numeric columns, got {len(numeric_columns)}"
+        )
+
+    def cells(features):
+        return features.assign(
+            **{
+                col: np.floor(features[col].to_numpy() / tolerance)
+                for col in numeric_columns
+            }
+        )
+
+    train_hashes = hash_feature_rows(cells(train))
+    test_cells = cells(test)
+    matches = np.zeros(len(test), dtype=bool)
+    for offsets in itertools.product((-1.0, 0.0, 1.0), repeat=len(numeric_columns)):
+        shifted = test_cells.assign(
+            **{
+                col: test_cells[col].to_numpy() + offset
+                for col, offset in zip(numeric_columns, offsets)
+            }
+        )
+        matches |= pd.Series(hash_feature_rows(shifted)).isin(train_hashes).to_numpy()
+    return matches
+
+
+def _matching_labels(test_index, mask):
+    """Return the test index labels selected by a boolean mask."""
+    return test_index[mask].to_numpy()
+
+
+def check_leakage(X_train, X_test, near_duplicate_tolerance=None):
+    """
+    Detect train/test leakage by index label and identifying columns.
+
+    Index labels, identifiers and row hashes are matched with hash tables, so
+    the check runs in linear time in the number of rows. Only overlapping
+    index labels or identifiers (IDENTIFYING_COLUMNS) set "has_leakage":
+    shared recipe names and identical feature rows are reported as well, but
+    names and low-cardinality features such as (minutes, complexity_score)
+    repeat across distinct recipes, so they do not fail the check.
+
+    Args:
+        X_train (pd.DataFrame): Training feature set.
+        X_test (pd.DataFrame): Testing feature set.
+        near_duplicate_tolerance (float): Optional grid width for an approximate
+            near-duplicate check on numeric columns (disabled by default).
+
+    Returns:
+        dict: Counts and test index labels for overlapping indices, overlapping
+            identifiers, shared names, duplicate feature rows and (optionally) near-duplicate
+            rows, plus a "has_leakage" flag.
+    """
+    index_overlap = X_test.index.isin(X_train.index)
+
+    identifier_overlap = np.zeros(len(X_test), dtype=bool)
+    for column in IDENTIFYING_COLUMNS:
+        if column in X_train.columns and column in X_test.columns:
+            identifier_overlap |= X_test[column].isin(X_train[column]).to_numpy()
+
+    name_overlap = np.zeros(len(X_test), dtype=bool)
+    if NAME_COLUMN in X_train.columns and NAME_COLUMN in X_test.columns:
+        name_overlap = X_test[NAME_COLUMN].isin(X_train[NAME_COLUMN]).to_numpy()
+
+    common_columns = X_train.columns.intersection(X_test.columns, sort=False)
+    train_hashes = hash_feature_rows(X_train[common_columns])
+    test_hashes = hash_feature_rows(X_test[common_columns])
+    duplicate_rows = pd.Series(test_hashes).isin(train_hashes).to_numpy()
+
+    results = {
+        "index_overlap": int(index_overlap.sum()),
+        "overlapping_index": _matching_labels(X_test.index, index_overlap),
+        "identifier_overlap": int(identifier_overlap.sum()),
+        "overlapping_identifier_index": _matching_labels(
+            X_test.index, identifier_overlap
+        ),
+        "name_overlap": int(name_overlap.sum()),
+        "shared_name_index": _matching_labels(X_test.index, name_overlap),
+        "duplicate_rows": int(duplicate_rows.sum()),
+        "duplicate_index": _matching_labels(X_test.index, duplicate_rows),
+        "near_duplicate_rows": None,
+        "near_duplicate_index": None,
+    }
+
+    if near_duplicate_tolerance is not None:
+        near_duplicates = _near_duplicate_rows(
+            X_train[common_columns], X_test[common_columns], near_duplicate_tolerance
+        )
+        results["near_duplicate_rows"] = int(near_duplicates.sum())
+        results["near_duplicate_index"] = _matching_labels(
+            X_test.index, near_duplicates
+        )
+
+    results["has_leakage"] = bool(
+        results["index_overlap"] or results["identifier_overlap"]
+    )
+    return results
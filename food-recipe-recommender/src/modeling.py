@@ -1,7 +1,7 @@
 from sklearn.cluster import KMeans
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
+from .evaluation import sweep_kmeans
+from .thread_budget import limit_threads
 
 
 def optimal_number_of_clusters(recipes_df):
@@ -14,19 +14,17 @@ def optimal_number_of_clusters(recipes_df):
     Returns:
         int: Optimal number of clusters.
     """
+    import matplotlib.pyplot as plt
+
     X = recipes_df[['minutes', 'complexity_score']]
 
     # Create a range of clusters
     clusters = range(2, 20)
 
-    # Create a list to store the inertia values
-    inertia_values = []
-
-    # Create a KMeans instance for each value of k
-    for k in clusters:
-        kmeans = KMeans(n_clusters=k, random_state=42)
-        kmeans.fit(X)
-        inertia_values.append(kmeans.inertia_)
+    # Fit a KMeans instance for each value of k in parallel; the workers split
+    # the training thread budget (see thread_budget.py)
+    sweep = sweep_kmeans(X, clusters, random_state=42, silhouette_sample_size=0)
+    inertia_values = [result['inertia'] for result in sweep]
 
     # Plot WCSS to find the "elbow"
     plt.figure(figsize=(8, 5))
@@ -48,20 +46,17 @@ def optimal_silhouette_score(recipes_df):
     Returns:
         int: Optimal number of clusters.
     """
+    import matplotlib.pyplot as plt
 
     X = recipes_df[['minutes', 'complexity_score']]
 
     # Create a range of clusters
     clusters = range(4, 10)
 
-    # Create a list to store the silhouette scores
-    silhouette_scores = []
-
-    # Create a KMeans instance for each value of k
-    for k in clusters:
-        kmeans = KMeans(n_clusters=k, random_state=42)
-        cluster_labels = kmeans.fit_predict(X)
-        silhouette_scores.append(silhouette_score(X, cluster_labels))
+    # Fit a KMeans instance for each value of k in parallel; the workers split
+    # the training thread budget (see thread_budget.py)
+    sweep = sweep_kmeans(X, clusters, random_state=42)
+    silhouette_scores = [result['silhouette'] for result in sweep]
 
     # Plot silhouette scores
     plt.figure(figsize=(8, 5))
@@ -87,9 +82,10 @@ def train_test_split_data(recipes_df):
     # Select features for clustering
     X = recipes_df[['minutes', 'complexity_score']]
 
-    # Train K-Means
+    # Train K-Means (within the training thread budget)
     kmeans = KMeans(n_clusters=6, random_state=42)
-    recipes_df['cluster'] = kmeans.fit_predict(X)
+    with limit_threads('training'):
+        recipes_df['cluster'] = kmeans.fit_predict(X)
 
     # Define feature columns (X) and target (y)
     X = recipes_df[['minutes', 'complexity_score']]  # Features: Cooking time and complexity
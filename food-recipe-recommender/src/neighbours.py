@@ -0,0 +1,260 @@
+"""
+neighbours.py
+Module for the precomputed "more like this" recipe neighbour graph.
+
+For every recipe the top-K most similar recipes are computed once at build
+time and stored in CSR form (indptr, indices, scores), so looking up similar
+recipes is an O(K) slice. Similarity blends ingredient overlap (Jaccard) with
+closeness in the scaled (minutes, complexity) space:
+
+    similarity = w_ingredients * jaccard + w_features * 1 / (1 + distance)
+
+Candidates for a recipe are the recipes sharing one of its rarest ingredients
+(common ones such as salt would make almost every pair a candidate). They are
+found with a sparse recipe x ingredient product, computed in chunks across
+processes, and then scored on their full ingredient lists.
+
+Memory per chunk is bounded: ingredients used by more than
+MAX_CANDIDATE_FREQUENCY recipes never generate candidates (a recipe made only
+of such staples gets no neighbours), and each recipe keeps at most
+MAX_CANDIDATES_PER_RECIPE candidates before the full-list scoring.
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from .ingredient_stats import explode_ingredients, factorize_tokens
+from .ranking import top_k_per_row
+from .thread_budget import worker_thread_limit
+
+# Neighbours stored per recipe
+NEIGHBOURS_PER_RECIPE = 10
+
+# Weight of each similarity signal
+NEIGHBOUR_WEIGHTS = {"ingredients": 0.7, "features": 0.3}
+
+# Rarest ingredients of a recipe used to generate its candidates
+CANDIDATE_INGREDIENTS = 3
+
+# Ingredients used by more recipes than this do not generate candidates, so a
+# recipe has at most CANDIDATE_INGREDIENTS * MAX_CANDIDATE_FREQUENCY candidates
+MAX_CANDIDATE_FREQUENCY = 2000
+
+# Candidates scored per recipe (most shared rare ingredients, then closest
+# features), which bounds the pairs built per chunk
+MAX_CANDIDATES_PER_RECIPE = 500
+
+# Recipes handled per parallel task
+NEIGHBOUR_CHUNK_SIZE = 512
+
+
+def _incidence_matrix(ingredients):
+    """
+    Build the binary recipe x ingredient matrix.
+
+    Args:
+        ingredients (pd.Series): Stringified ingredient lists, one per recipe.
+
+    Returns:
+        scipy.sparse.csr_matrix: int32 matrix of shape (n_recipes, n_ingredients).
+    """
+    from scipy import sparse
+
+    positions, codes, vocabulary = factorize_tokens(ingredients, explode_ingredients)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.int32), (positions, codes)),
+        shape=(len(ingredients), len(vocabulary)),
+    )
+
+    # An ingredient listed twice in a recipe still counts once
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    return incidence
+
+
+def _rarest_ingredients(
+    incidence, n_ingredients, max_frequency=MAX_CANDIDATE_FREQUENCY
+):
+    """
+    Keep each recipe's n rarest ingredients (by number of recipes using them).
+
+    Args:
+        incidence (scipy.sparse.csr_matrix): Recipe x ingredient matrix.
+        n_ingredients (int): Ingredients kept per recipe.
+        max_frequency (int): Ingredients used by more recipes are never kept.
+
+    Returns:
+        scipy.sparse.csr_matrix: Matrix with at most n entries per row.
+    """
+    from scipy import sparse
+
+    coo = incidence.tocoo()
+    frequency = np.bincount(coo.col, minlength=incidence.shape[1])
+    order = np.lexsort((coo.col, frequency[coo.col], coo.row))
+    rows, columns = coo.row[order], coo.col[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+    keep = (rank < n_ingredients) & (frequency[columns] <= max_frequency)
+    return sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=np.int32), (rows[keep], columns[keep])),
+        shape=incidence.shape,
+    )
+
+
+def _chunk_neighbours(
+    incidence,
+    rare,
+    features,
+    start,
+    stop,
+    k,
+    weights,
+    max_candidates=MAX_CANDIDATES_PER_RECIPE,
+):
+    """
+    Compute the top-k neighbours of recipes start..stop-1.
+
+    At most max_candidates candidates per recipe are scored: those sharing the
+    most rare ingredients with it, ties going to the closest features.
+
+    Returns:
+        tuple: (rows, columns, scores) of the kept edges, sorted by row and
+            descending score.
+    """
+    candidates = (rare[start:stop] @ incidence.T).tocoo()
+    rows = candidates.row.astype(np.int64) + start
+    columns = candidates.col.astype(np.int64)
+    not_self = rows != columns
+    rows, columns = rows[not_self], columns[not_self]
+    distance = np.linalg.norm(features[rows] - features[columns], axis=1)
+
+    # Closeness is below 1, so it only breaks ties between equal shared counts
+    rows, columns, _ = top_k_per_row(
+        rows,
+        columns,
+        candidates.data[not_self] + 1.0 / (1.0 + distance),
+        max_candidates,
+    )
+
+    # Exact overlap of the candidate pairs on their full ingredient lists
+    shared = np.asarray(
+        incidence[rows].multiply(incidence[columns]).sum(axis=1), dtype=np.float64
+    ).ravel()
+    sizes = np.diff(incidence.indptr)
+    jaccard = shared / (sizes[rows] + sizes[columns] - shared)
+    distance = np.linalg.norm(features[rows] - features[columns], axis=1)
+    scores = weights["ingredients"] * jaccard + weights["features"] / (1.0 + distance)
+
+    return top_k_per_row(rows, columns, scores, k)
+
+
+def build_neighbour_graph(
+    ingredients,
+    features,
+    k=NEIGHBOURS_PER_RECIPE,
+    weights=None,
+    chunk_size=NEIGHBOUR_CHUNK_SIZE,
+    n_jobs=-1,
+):
+    """
+    Compute every recipe's top-k similar recipes as a CSR graph.
+
+    Args:
+        ingredients (pd.Series): Stringified ingredient lists, one per recipe.
+        features (np.ndarray): Scaled (minutes, complexity) rows per recipe.
+        k (int): Neighbours kept per recipe.
+        weights (dict): Overrides for NEIGHBOUR_WEIGHTS.
+        chunk_size (int): Recipes per parallel task.
+        n_jobs (int): Number of worker processes (-1 uses all cores).
+
+    Returns:
+        dict: "indptr" (int64), "indices" (int32) and "scores" (float32) arrays;
+            the neighbours of recipe i are indices[indptr[i]:indptr[i + 1]].
+
+    Raises:
+        ValueError: If k is not a positive integer
+    """
+    if not isinstance(k, int) or k < 1:
+        raise ValueError("Number of neighbours must be a positive integer")
+
+    weights = {**NEIGHBOUR_WEIGHTS, **(weights or {})}
+    incidence = _incidence_matrix(ingredients)
+    rare = _rarest_ingredients(incidence, CANDIDATE_INGREDIENTS)
+    features = np.asarray(features, dtype=np.float64)
+    n_recipes = incidence.shape[0]
+
+    with worker_thread_limit(n_jobs):
+        chunks = Parallel(n_jobs=n_jobs, pre_dispatch="2*n_jobs")(
+            delayed(_chunk_neighbours)(
+                incidence,
+                rare,
+                features,
+                start,
+                min(start + chunk_size, n_recipes),
+                k,
+                weights,
+            )
+            for start in range(0, n_recipes, chunk_size)
+        )
+
+    rows = np.concatenate([chunk[0] for chunk in chunks] or [np.empty(0, np.int64)])
+    indptr = np.zeros(n_recipes + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_recipes))
+    return {
+        "indptr": indptr,
+        "indices": np.concatenate(
+            [chunk[1] for chunk in chunks] or [np.empty(0, np.int64)]
+        ).astype(np.int32),
+        "scores": np.concatenate(
+            [chunk[2] for chunk in chunks] or [np.empty(0)]
+        ).astype(np.float32),
+    }
+
+
+def neighbours_of(graph, position):
+    """
+    Look up a recipe's precomputed neighbours in O(k).
+
+    Args:
+        graph (dict): Graph from build_neighbour_graph.
+        position (int): Row position of the recipe.
+
+    Returns:
+        tuple: (positions, scores) of its neighbours, most similar first.
+    """
+    start, stop = graph["indptr"][position], graph["indptr"][position + 1]
+    return graph["indices"][start:stop], graph["scores"][start:stop]
+
+
+def subset_neighbour_graph(graph, positions):
+    """
+    Restrict a graph to some recipes, renumbering them 0..len(positions)-1.
+
+    Edges to recipes outside the subset are dropped.
+
+    Args:
+        graph (dict): Graph from build_neighbour_graph.
+        positions (np.ndarray): Row positions of the recipes to keep.
+
+    Returns:
+        dict: Graph over the kept recipes.
+    """
+    n_recipes = len(graph["indptr"]) - 1
+    new_position = np.full(n_recipes, -1, dtype=np.int64)
+    new_position[positions] = np.arange(len(positions))
+
+    # Edge ids of the kept rows, in row order
+    counts = np.diff(graph["indptr"])[positions]
+    first_edges = np.cumsum(counts) - counts
+    edges = np.repeat(graph["indptr"][positions] - first_edges, counts) + np.arange(
+        counts.sum()
+    )
+    rows = np.repeat(np.arange(len(positions)), counts)
+    targets = new_position[graph["indices"][edges]]
+    keep = targets >= 0
+
+    indptr = np.zeros(len(positions) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows[keep], minlength=len(positions)))
+    return {
+        "indptr": indptr,
+        "indices": targets[keep].astype(np.int32),
+        "scores": graph["scores"][edges[keep]],
+    }
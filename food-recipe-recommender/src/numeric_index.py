@@ -0,0 +1,214 @@
+"""
+numeric_index.py
+Module for sorted and gridded indexes over numeric recipe columns.
+
+A boolean mask over a column touches every recipe. These indexes are built
+once with the model and answer range and "within X" queries in O(log n + k)
+(sorted index) or in proportion to the grid cells a query touches (grid).
+"""
+
+import numpy as np
+
+# Width of a grid cell on each axis, in column units (minutes, complexity points)
+GRID_CELL_SIZE = 5.0
+
+# Cap on cells per grid axis; outlying values share the last cell
+MAX_GRID_CELLS = 256
+
+
+class NumericIndex:
+    """Sorted permutation of one numeric column."""
+
+    def __init__(self, values):
+        """
+        Sort the column once.
+
+        Args:
+            values (np.ndarray): Column value per recipe position.
+        """
+        self.values = np.asarray(values)
+        self.order = np.argsort(self.values, kind="stable")
+        self.sorted_values = self.values[self.order]
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the index arrays."""
+        return sum(
+            value.nbytes
+            for value in vars(self).values()
+            if isinstance(value, np.ndarray)
+        )
+
+    def bounds(self, low=None, high=None):
+        """
+        Locate an inclusive value range in the sorted column in O(log n).
+
+        Args:
+            low (float): Inclusive lower bound (None for no bound).
+            high (float): Inclusive upper bound (None for no bound).
+
+        Returns:
+            tuple: (start, end) such that order[start:end] are the matches.
+        """
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, "left")
+        end = (
+            len(self.values)
+            if high is None
+            else np.searchsorted(self.sorted_values, high, "right")
+        )
+        return int(start), int(max(start, end))
+
+    def count(self, low=None, high=None):
+        """Return the number of values in [low, high] in O(log n)."""
+        start, end = self.bounds(low, high)
+        return end - start
+
+    def range(self, low=None, high=None):
+        """
+        Return the positions whose value lies in [low, high].
+
+        Args:
+            low (float): Inclusive lower bound (None for no bound).
+            high (float): Inclusive upper bound (None for no bound).
+
+        Returns:
+            np.ndarray: Matching positions, ordered by value.
+        """
+        start, end = self.bounds(low, high)
+        return self.order[start:end]
+
+    def within(self, center, radius):
+        """
+        Return the positions whose value is at most radius away from center.
+
+        Args:
+            center (float): Target value, e.g. a desired cooking time.
+            radius (float): Largest accepted difference.
+
+        Returns:
+            np.ndarray: Matching positions, ordered by value.
+        """
+        return self.range(center - radius, center + radius)
+
+    def contains(self, positions, low=None, high=None):
+        """Return a mask of the positions whose value lies in [low, high]."""
+        values = self.values[positions]
+        mask = np.ones(len(positions), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+
+class GridIndex:
+    """2-D bucket grid over two numeric columns, e.g. minutes and complexity."""
+
+    def __init__(self, x, y, cell_size=GRID_CELL_SIZE):
+        """
+        Bucket every point into a grid cell.
+
+        Args:
+            x (np.ndarray): First column per recipe position.
+            y (np.ndarray): Second column per recipe position.
+            cell_size (float): Cell width on both axes.
+        """
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.cell_size = float(cell_size)
+        self.origin = (
+            float(self.x.min()) if len(self.x) else 0.0,
+            float(self.y.min()) if len(self.y) else 0.0,
+        )
+        self.shape = (
+            self._n_cells(self.x, self.origin[0]),
+            self._n_cells(self.y, self.origin[1]),
+        )
+
+        cells = self._cell(self.x, 0) * self.shape[1] + self._cell(self.y, 1)
+        self.order = np.argsort(cells, kind="stable")
+        self.offsets = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+        self.offsets[1:] = np.cumsum(
+            np.bincount(cells, minlength=self.shape[0] * self.shape[1])
+        )
+
+    @property
+    def nbytes(self):
+        """Bytes held by the index arrays."""
+        return sum(
+            value.nbytes
+            for value in vars(self).values()
+            if isinstance(value, np.ndarray)
+        )
+
+    def _n_cells(self, values, origin):
+        """Number of cells needed on one axis, capped at MAX_GRID_CELLS."""
+        if not len(values):
+            return 1
+        span = float(values.max()) - origin
+        return int(min(MAX_GRID_CELLS, np.floor(span / self.cell_size) + 1))
+
+    def _cell(self, values, axis):
+        """Cell coordinate of values along an axis (outliers clipped)."""
+        cells = np.floor(
+            (np.asarray(values, dtype=np.float64) - self.origin[axis]) / self.cell_size
+        )
+        return np.clip(cells, 0, self.shape[axis] - 1).astype(np.int64)
+
+    def box(self, x_range, y_range):
+        """
+        Return the positions inside an inclusive box.
+
+        Only the cells overlapping the box are read, and their points are
+        checked exactly.
+
+        Args:
+            x_range (tuple): (low, high) on the first column.
+            y_range (tuple): (low, high) on the second column.
+
+        Returns:
+            np.ndarray: Matching positions, grouped by cell.
+        """
+        (x_low, x_high), (y_low, y_high) = x_range, y_range
+        if x_low > x_high or y_low > y_high:
+            return np.empty(0, dtype=np.int64)
+
+        x_first, x_last = self._cell([x_low, x_high], 0)
+        y_first, y_last = self._cell([y_low, y_high], 1)
+        rows = np.arange(x_first, x_last + 1) * self.shape[1]
+        starts = self.offsets[rows + y_first]
+        ends = self.offsets[rows + y_last + 1]
+        if not len(starts) or (ends - starts).sum() == 0:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = np.concatenate(
+            [self.order[start:end] for start, end in zip(starts, ends)]
+        )
+        x, y = self.x[candidates], self.y[candidates]
+        keep = (x >= x_low) & (x <= x_high) & (y >= y_low) & (y <= y_high)
+        return candidates[keep]
+
+    def within(self, x, y, radius):
+        """
+        Return the positions within a Euclidean radius of a point.
+
+        Args:
+            x (float): First coordinate, e.g. a desired cooking time.
+            y (float): Second coordinate, e.g. a desired complexity.
+            radius (float): Largest accepted distance.
+
+        Returns:
+            tuple: (positions, distances), nearest first.
+        """
+        candidates = self.box((x - radius, x + radius), (y - radius, y + radius))
+        distances = np.hypot(
+            self.x[candidates].astype(np.float64) - x,
+            self.y[candidates].astype(np.float64) - y,
+        )
+        keep = distances <= radius
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
@@ -0,0 +1,265 @@
+"""
+personalization.py
+Module for personalized ranking from Food.com user ratings.
+
+Ratings are kept as a sparse user x recipe matrix. Recipe-recipe cosine
+similarities are computed at build time with sparse products over blocks of
+recipes (so memory is bounded by the block, not the catalogue), and only the
+top-M similar recipes of each recipe are stored in CSR form. At query time a
+user's affinity for a recipe is the similarity-weighted average of their
+centred ratings of its similar recipes:
+
+    affinity = sum(similarity * centred_rating) / (sum(similarity) + shrinkage)
+
+so the cost depends on the size of the user's history, not on the number of
+users or interactions.
+"""
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from .ranking import MAX_RATING, top_k_per_row
+from .thread_budget import worker_thread_limit
+
+# Similar recipes stored per recipe
+SIMILAR_RECIPES_PER_RECIPE = 20
+
+# Recipes whose similarities are computed per sparse product
+SIMILARITY_BLOCK_SIZE = 1024
+
+# Ratings kept per user; a user with h ratings adds h^2 pairs to the similarity
+# products, so a few very active users would otherwise dominate the build time
+MAX_RATINGS_PER_USER = 500
+
+# Rating mapped to an affinity of 0 (higher ratings are positive)
+NEUTRAL_RATING = 3.0
+
+# Pulls affinities backed by little similarity mass towards 0
+AFFINITY_SHRINKAGE = 1.0
+
+
+def build_user_item_matrix(interactions, recipe_ids):
+    """
+    Build the sparse user x recipe rating matrix.
+
+    Interactions with an unknown recipe or without a rating (0 on Food.com)
+    are dropped; if a user rated a recipe twice, the last listed rating wins,
+    and only a user's last MAX_RATINGS_PER_USER listed ratings are kept. If a
+    recipe id repeats, its ratings go to every recipe with that id.
+
+    Args:
+        interactions (pd.DataFrame): user_id, recipe_id and rating columns.
+        recipe_ids (np.ndarray): Recipe id per recipe position.
+
+    Returns:
+        tuple: (matrix, user_ids) where matrix is a float32 CSR matrix of shape
+            (n_users, n_recipes) and user_ids holds the user id of each row,
+            sorted.
+    """
+    from scipy import sparse
+
+    # Ratings are matched to distinct recipe ids, then spread to their positions
+    id_codes, unique_ids = pd.factorize(np.asarray(recipe_ids))
+    id_positions = pd.Index(unique_ids).get_indexer(interactions["recipe_id"])
+    ratings = interactions["rating"].to_numpy()
+    keep = (id_positions >= 0) & (ratings > 0)
+    pairs = pd.DataFrame(
+        {
+            "user_id": interactions["user_id"].to_numpy()[keep],
+            "id_position": id_positions[keep],
+            "rating": ratings[keep],
+        }
+    ).drop_duplicates(["user_id", "id_position"], keep="last")
+    pairs = pairs.groupby("user_id", sort=False).tail(MAX_RATINGS_PER_USER)
+
+    # Recipe positions grouped by id (one position per id unless ids repeat)
+    has_id = np.flatnonzero(id_codes >= 0)
+    by_id = has_id[np.argsort(id_codes[has_id], kind="stable")]
+    id_counts = np.bincount(id_codes[has_id], minlength=len(unique_ids))
+    id_starts = np.cumsum(id_counts) - id_counts
+
+    pair_ids = pairs["id_position"].to_numpy()
+    copies = id_counts[pair_ids]
+    first_copies = np.cumsum(copies) - copies
+    positions = by_id[
+        np.repeat(id_starts[pair_ids] - first_copies, copies) + np.arange(copies.sum())
+    ]
+
+    user_ids, rows = np.unique(pairs["user_id"].to_numpy(), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (
+            np.repeat(pairs["rating"].to_numpy(dtype=np.float32), copies),
+            (np.repeat(rows, copies), positions),
+        ),
+        shape=(len(user_ids), len(recipe_ids)),
+    )
+    return matrix, user_ids
+
+
+def _block_similarities(columns, normalized, start, stop, k):
+    """
+    Compute the top-k similar recipes of recipes start..stop-1.
+
+    Returns:
+        tuple: (rows, columns, scores) of the kept pairs, sorted by row and
+            descending similarity.
+    """
+    similarities = (columns[:, start:stop].T @ normalized).tocoo()
+    rows = similarities.row.astype(np.int64) + start
+    targets = similarities.col.astype(np.int64)
+    not_self = rows != targets
+    return top_k_per_row(
+        rows[not_self], targets[not_self], similarities.data[not_self], k
+    )
+
+
+def build_item_similarities(
+    matrix, k=SIMILAR_RECIPES_PER_RECIPE, block_size=SIMILARITY_BLOCK_SIZE, n_jobs=-1
+):
+    """
+    Compute every recipe's top-k most similar recipes by cosine similarity.
+
+    Args:
+        matrix (scipy.sparse.csr_matrix): User x recipe rating matrix.
+        k (int): Similar recipes kept per recipe.
+        block_size (int): Recipes per sparse product (bounds peak memory).
+        n_jobs (int): Number of worker processes (-1 uses all cores).
+
+    Returns:
+        dict: "indptr" (int64), "indices" (int32) and "scores" (float32) arrays
+            in the same CSR layout as the neighbour graph.
+
+    Raises:
+        ValueError: If k or block_size is not a positive integer
+    """
+    from scipy import sparse
+
+    if not isinstance(k, int) or k < 1:
+        raise ValueError("Number of similar recipes must be a positive integer")
+    if not isinstance(block_size, int) or block_size < 1:
+        raise ValueError("Block size must be a positive integer")
+
+    # Unit-length recipe columns, so a product of two columns is their cosine
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    normalized = (matrix @ sparse.diags(scale.astype(np.float32))).tocsr()
+    columns = normalized.tocsc()
+    n_recipes = matrix.shape[1]
+
+    with worker_thread_limit(n_jobs):
+        blocks = Parallel(n_jobs=n_jobs, pre_dispatch="2*n_jobs")(
+            delayed(_block_similarities)(
+                columns, normalized, start, min(start + block_size, n_recipes), k
+            )
+            for start in range(0, n_recipes, block_size)
+        )
+
+    rows = np.concatenate([block[0] for block in blocks] or [np.empty(0, np.int64)])
+    indptr = np.zeros(n_recipes + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_recipes))
+    return {
+        "indptr": indptr,
+        "indices": np.concatenate(
+            [block[1] for block in blocks] or [np.empty(0, np.int64)]
+        ).astype(np.int32),
+        "scores": np.concatenate(
+            [block[2] for block in blocks] or [np.empty(0)]
+        ).astype(np.float32),
+    }
+
+
+def build_personalization(interactions, recipe_ids, k=SIMILAR_RECIPES_PER_RECIPE):
+    """
+    Precompute everything personalized ranking needs from the interactions.
+
+    Args:
+        interactions (pd.DataFrame): user_id, recipe_id and rating columns.
+        recipe_ids (np.ndarray): Recipe id per recipe position.
+        k (int): Similar recipes kept per recipe.
+
+    Returns:
+        dict: The recipe similarity graph ("indptr", "indices", "scores") and
+            each user's centred ratings in CSR form ("user_ids", "user_indptr",
+            "user_items", "user_ratings").
+    """
+    matrix, user_ids = build_user_item_matrix(interactions, recipe_ids)
+    matrix.sort_indices()
+    return {
+        **build_item_similarities(matrix, k),
+        "user_ids": user_ids,
+        "user_indptr": matrix.indptr.astype(np.int64),
+        "user_items": matrix.indices.astype(np.int32),
+        "user_ratings": (
+            (matrix.data - NEUTRAL_RATING) / (MAX_RATING - NEUTRAL_RATING)
+        ).astype(np.float32),
+    }
+
+
+def user_affinity(personalization, user_id):
+    """
+    Score the recipes similar to the ones a user has rated.
+
+    Args:
+        personalization (dict): Data from build_personalization.
+        user_id (int): Food.com user id.
+
+    Returns:
+        tuple: (positions, affinities) with positions sorted and affinities in
+            [-1, 1], or None if the user has no ratings (cold start).
+    """
+    user_ids = personalization["user_ids"]
+    row = np.searchsorted(user_ids, user_id)
+    if row == len(user_ids) or user_ids[row] != user_id:
+        return None
+
+    start, stop = personalization["user_indptr"][row : row + 2]
+    items = personalization["user_items"][start:stop]
+    ratings = personalization["user_ratings"][start:stop]
+
+    # Similarity edges of every rated recipe, gathered in one pass
+    indptr = personalization["indptr"]
+    counts = indptr[items + 1] - indptr[items]
+    first_edges = np.cumsum(counts) - counts
+    edges = np.repeat(indptr[items] - first_edges, counts) + np.arange(counts.sum())
+    similarities = personalization["scores"][edges].astype(np.float64)
+
+    positions, inverse = np.unique(
+        personalization["indices"][edges], return_inverse=True
+    )
+    weighted = np.bincount(
+        inverse, similarities * np.repeat(ratings, counts), minlength=len(positions)
+    )
+    total = np.bincount(inverse, similarities, minlength=len(positions))
+    return positions, weighted / (total + AFFINITY_SHRINKAGE)
+
+
+def subset_personalization(personalization, positions):
+    """
+    Restrict the similar recipes to a subset, renumbering them 0..len(positions)-1.
+
+    Users' ratings still refer to every recipe, so a shard scores its own
+    recipes exactly as the full model does.
+
+    Args:
+        personalization (dict): Data from build_personalization.
+        positions (np.ndarray): Row positions of the recipes to keep.
+
+    Returns:
+        dict: Personalization data whose similarity targets are subset positions.
+    """
+    indptr = personalization["indptr"]
+    n_recipes = len(indptr) - 1
+    new_position = np.full(n_recipes, -1, dtype=np.int64)
+    new_position[positions] = np.arange(len(positions))
+
+    targets = new_position[personalization["indices"]]
+    keep = targets >= 0
+    rows = np.repeat(np.arange(n_recipes), np.diff(indptr))
+    subset_indptr = np.zeros(n_recipes + 1, dtype=np.int64)
+    subset_indptr[1:] = np.cumsum(np.bincount(rows[keep], minlength=n_recipes))
+    return {
+        **personalization,
+        "indptr": subset_indptr,
+        "indices": targets[keep].astype(np.int32),
+        "scores": personalization["scores"][keep],
+    }
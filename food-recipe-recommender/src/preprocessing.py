@@ -1,13 +1,9 @@
 """Module Imports"""
 
-import ast
 from pathlib import Path
-from collections import Counter
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
-from wordcloud import WordCloud
 from .config import RAW_RECIPES_PATH, RAW_INTERACTIONS_PATH
+from .ingredient_stats import compute_ingredient_stats, top_ingredients
 
 
 def load_data():
@@ -52,10 +48,15 @@ def summary_data(recipes, interactions):
     print(interactions.isnull().sum())
 
 
+# Plotting libraries are imported inside each plot function so that loading
+# and preprocessing data does not pay for matplotlib, seaborn and wordcloud.
+
+
 def plot_preparation_time(recipes):
     """
     Plots histogram of preparation time
     """
+    import matplotlib.pyplot as plt
 
     plt.hist(recipes["minutes"], bins=18, edgecolor="blue")
     plt.title("Distribution of Preparation Time (minutes)")
@@ -68,6 +69,8 @@ def plot_ratings_distribution(interactions):
     """
     Plots the distribution of ratings for recipes.
     """
+    import matplotlib.pyplot as plt
+
     plt.hist(interactions["rating"], bins=5, edgecolor="blue", align="mid")
     plt.title("Distribution of Ratings")
     plt.xlabel("Ratings (1 to 5)")
@@ -80,6 +83,8 @@ def plot_ingredients_distribution(recipes):
     """
     Plots the histogram of the number of ingredients in recipes.
     """
+    import matplotlib.pyplot as plt
+
     plt.hist(recipes["n_ingredients"], bins=20, edgecolor="blue")
     plt.title("Distribution of Number of Ingredients")
     plt.xlabel("Number of Ingredients")
@@ -91,6 +96,9 @@ def plot_correlation_heatmap(recipes):
     """
     Plots a heatmap showing correlations between numeric features.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     numeric_features = ["minutes", "n_steps", "n_ingredients"]
     corr_matrix = recipes[numeric_features].corr()
 
@@ -104,6 +112,9 @@ def plot_review_sentiment(interactions):
     """
     Creates a word cloud from review text in the interactions dataset.
     """
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
     review_text = " ".join(interactions["review"].dropna())
     wordcloud = WordCloud(width=800, height=400, background_color="white").generate(
         review_text
@@ -118,14 +129,11 @@ def plot_review_sentiment(interactions):
 
 def plot_prep_time_vs_ingredients(recipes):
     """Plot preparation time against number of ingredients"""
+    import matplotlib.pyplot as plt
 
-    # Assuming 'ingredients' column is a list of ingredients
-    recipes["num_ingredients"] = recipes["ingredients"].apply(
-        lambda x: len(ast.literal_eval(x))
-    )
-
+    # RAW_recipes already counts the ingredients, so the lists are not parsed
     plt.figure(figsize=(10, 6))
-    plt.scatter(recipes["minutes"], recipes["num_ingredients"], alpha=0.5)
+    plt.scatter(recipes["minutes"], recipes["n_ingredients"], alpha=0.5)
     plt.title("Preparation Time vs Number of Ingredients")
     plt.xlabel("Preparation Time (minutes)")
     plt.ylabel("Number of Ingredients")
@@ -133,17 +141,14 @@ def plot_prep_time_vs_ingredients(recipes):
     plt.show()
 
 
-def plot_most_used_ingredients(recipes, top_n=10):
+def plot_most_used_ingredients(recipes, top_n=10, stats=None):
     """Plot the most used ingredients"""
+    import matplotlib.pyplot as plt
 
-    # Flatten the list of ingredients and count occurrences
-    all_ingredients = [
-        ingredient
-        for sublist in recipes["ingredients"].apply(eval)
-        for ingredient in sublist
-    ]
-    ingredient_counts = Counter(all_ingredients)
-    most_common_ingredients = ingredient_counts.most_common(top_n)
+    # Count occurrences with the vectorized statistics unless cached ones are given
+    if stats is None:
+        stats = compute_ingredient_stats(recipes["ingredients"])
+    most_common_ingredients = top_ingredients(stats, top_n)
 
     # Unzip the list of tuples
     ingredients, counts = zip(*most_common_ingredients)
@@ -159,22 +164,21 @@ def plot_most_used_ingredients(recipes, top_n=10):
 def preprocess_data(recipes, interactions):
     """Clean up the data for usability"""
 
-    recipes_cleaned = recipes.copy()  # Ensure it's a separate copy
-    recipes_cleaned["num_ingredients"] = recipes_cleaned["ingredients"].apply(
-        lambda x: len(ast.literal_eval(x))
-    )
-
     # Apply the filtering criteria:
     # - Keep only recipes with <= 20 ingredients
     # - Keep only recipes with preparation time <= 60 minutes
-    recipes_filtered = recipes_cleaned.loc[
-        (recipes_cleaned["num_ingredients"] <= 20) & (recipes_cleaned["minutes"] <= 60)
+    # The mask is built from the numeric columns (RAW_recipes already has
+    # n_ingredients), so only the kept rows are copied, once
+    recipes_filtered = recipes.loc[
+        (recipes["n_ingredients"] <= 20) & (recipes["minutes"] <= 60)
     ]
 
-    print(f"Original dataset size: {recipes_cleaned.shape[0]} recipes")
+    print(f"Original dataset size: {recipes.shape[0]} recipes")
     print(f"Filtered dataset size: {recipes_filtered.shape[0]} recipes")
 
-    # Fill missing values in interactions
-    interactions["review"] = interactions["review"].fillna("Unknown")
+    # Fill missing values in interactions (only the missing cells are written;
+    # fillna would build a whole new column)
+    missing_reviews = interactions["review"].isna()
+    interactions.loc[missing_reviews, "review"] = "Unknown"
 
     return recipes_filtered, interactions
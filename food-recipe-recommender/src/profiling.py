@@ -0,0 +1,350 @@
+"""
+profiling.py
+Module for on-demand CPU and allocation profiling of pipeline stages and requests.
+
+Profiling is off unless asked for, either for a whole process through an
+environment variable:
+
+    RECIPE_PROFILE=all                    (every stage)
+    RECIPE_PROFILE=build_model,recommend  (only the named stages)
+    RECIPE_PROFILE_DIR=/tmp/profiles      (default: ./profiles)
+
+or for a single app request with ?profile=1 in the URL. The URL parameter is
+ignored unless the operator allows it when starting the server:
+
+    RECIPE_PROFILE_REQUESTS=1             (honour ?profile=1)
+
+Each captured stage writes three files sharing one name:
+
+    <stage>-<time>-<pid>-<n>.pstats      cProfile call statistics
+    <stage>-<time>-<pid>-<n>.tracemalloc allocation snapshot
+    <stage>-<time>-<pid>-<n>.collapsed   allocation stacks, "a;b;c bytes" lines
+
+The allocation files hold the memory allocated during the stage and still
+held when it ends. Only the newest PROFILE_MAX_CAPTURES captures are kept
+in the output directory; older ones are deleted. Captures from two runs are compared with diff_profiles and
+diff_snapshots (or `python -m src.profiling before after`), and collapsed files
+with any flame graph diff tool.
+
+When profiling is disabled a stage costs one environment lookup.
+"""
+
+import cProfile
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+from pathlib import Path
+import pandas as pd
+from .config import PROFILES_DIR
+
+# Environment variable listing the stages to profile ("all" for every stage)
+PROFILE_ENV = "RECIPE_PROFILE"
+
+# Environment variable overriding the directory profiles are written to
+PROFILE_DIR_ENV = "RECIPE_PROFILE_DIR"
+
+# Environment variable that lets app visitors profile requests with ?profile=1
+# (off unless set to "1", since captures cost CPU and disk on the server)
+PROFILE_REQUESTS_ENV = "RECIPE_PROFILE_REQUESTS"
+
+# Captures kept in the output directory; older ones are deleted
+PROFILE_MAX_CAPTURES = 50
+
+# Output file suffixes of one capture
+PROFILE_SUFFIXES = ("pstats", "tracemalloc", "collapsed")
+
+# Stack frames recorded per allocation
+PROFILE_TRACEBACK_FRAMES = 32
+
+# Rows shown by the diff functions
+PROFILE_DIFF_ROWS = 20
+
+# cProfile and tracemalloc are process-wide, so one capture runs at a time;
+# stages started during a capture (nested or on other threads) are skipped
+_capture_lock = threading.Lock()
+
+# Distinguishes captures of the same stage started within the same second
+_capture_counter = itertools.count()
+
+
+def profiling_enabled(stage):
+    """
+    Check whether the environment asks for a stage to be profiled.
+
+    Args:
+        stage (str): Stage name, e.g. "build_model" or "recommend".
+
+    Returns:
+        bool: True if RECIPE_PROFILE lists the stage or "all".
+    """
+    setting = os.environ.get(PROFILE_ENV)
+    if not setting:
+        return False
+    stages = {name.strip() for name in setting.split(",")}
+    return "all" in stages or stage in stages
+
+
+def request_profiling_allowed():
+    """
+    Check whether the operator lets app requests ask to be profiled.
+
+    Returns:
+        bool: True if RECIPE_PROFILE_REQUESTS is set to "1".
+    """
+    return os.environ.get(PROFILE_REQUESTS_ENV) == "1"
+
+
+def prune_profiles(output_dir, max_captures=PROFILE_MAX_CAPTURES):
+    """
+    Delete the oldest captures so at most max_captures remain.
+
+    Args:
+        output_dir (str or Path): Directory the captures were written to.
+        max_captures (int): Captures to keep.
+    """
+    captures = sorted(
+        Path(output_dir).glob("*.pstats"), key=lambda path: path.stat().st_mtime
+    )
+    for path in captures[: max(len(captures) - max_captures, 0)]:
+        for suffix in PROFILE_SUFFIXES:
+            path.with_suffix(f".{suffix}").unlink(missing_ok=True)
+
+
+class StageProfile:
+    """Capture cProfile stats and a tracemalloc snapshot around one stage."""
+
+    def __init__(self, stage, output_dir=None):
+        """
+        Initialize the capture.
+
+        Args:
+            stage (str): Stage name used in the output file names.
+            output_dir (str or Path): Directory for the output files (default:
+                RECIPE_PROFILE_DIR, or the profiles directory).
+        """
+        self.stage = stage
+        self.output_dir = Path(
+            output_dir or os.environ.get(PROFILE_DIR_ENV) or PROFILES_DIR
+        )
+        self.paths = {}  # Output file per kind, once the stage has finished
+        self.peak_bytes = None  # Traced peak, if tracing started with the stage
+        self._profiler = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        if not _capture_lock.acquire(blocking=False):
+            print(f"Skipping profile of {self.stage}: another capture is running")
+            return self
+
+        # Allocations made before the stage are not traced, unless the caller
+        # was already tracing (e.g. benchmark_build_memory), whose peak is then
+        # left alone
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEBACK_FRAMES)
+            self._started_tracing = True
+
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self._profiler is None:
+            return False
+
+        try:
+            self._profiler.disable()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                )
+            )
+            if self._started_tracing:
+                self.peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self._write(snapshot)
+        finally:
+            self._profiler = None
+            _capture_lock.release()
+        return False
+
+    def _write(self, snapshot):
+        """Write the pstats, snapshot and collapsed-stack files."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        name = (
+            f"{self.stage}-{time.strftime('%Y%m%d-%H%M%S')}"
+            f"-{os.getpid()}-{next(_capture_counter)}"
+        )
+        self.paths = {
+            suffix: self.output_dir / f"{name}.{suffix}" for suffix in PROFILE_SUFFIXES
+        }
+
+        self._profiler.dump_stats(str(self.paths["pstats"]))
+        snapshot.dump(str(self.paths["tracemalloc"]))
+        self.paths["collapsed"].write_text(collapsed_stacks(snapshot))
+        prune_profiles(self.output_dir)
+        peak = (
+            f", peak {self.peak_bytes / 1e6:.1f} MB traced"
+            if self.peak_bytes is not None
+            else ""
+        )
+        print(f"Profiled {self.stage}{peak}: written to {self.output_dir / name}.*")
+
+
+def profile_stage(stage, enabled=None, output_dir=None):
+    """
+    Profile a block of code if profiling is enabled for its stage.
+
+    Usage:
+        with profile_stage("preprocess_data"):
+            recipes, interactions = preprocess_data(recipes, interactions)
+
+    Args:
+        stage (str): Stage name.
+        enabled (bool): Force profiling on or off (default: ask the
+            RECIPE_PROFILE environment variable).
+        output_dir (str or Path): Directory for the output files.
+
+    Returns:
+        Context manager: A StageProfile, or a no-op context when disabled.
+    """
+    if enabled is None:
+        enabled = profiling_enabled(stage)
+    if not enabled:
+        return nullcontext()
+    return StageProfile(stage, output_dir)
+
+
+def profiled(stage):
+    """
+    Decorate a function so each call is profiled when its stage is enabled.
+
+    Args:
+        stage (str): Stage name checked against RECIPE_PROFILE on every call.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiling_enabled(stage):
+                return function(*args, **kwargs)
+            with StageProfile(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def collapsed_stacks(snapshot):
+    """
+    Format a snapshot's allocations as collapsed stacks.
+
+    Each line is "file:line;file:line;... bytes" from the outermost frame to
+    the allocating one, sorted so files from two runs diff line by line.
+
+    Args:
+        snapshot (tracemalloc.Snapshot): Allocation snapshot.
+
+    Returns:
+        str: One line per distinct allocation stack.
+    """
+    lines = sorted(
+        ";".join(
+            f"{Path(frame.filename).name}:{frame.lineno}" for frame in stat.traceback
+        )
+        + f" {stat.size}"
+        for stat in snapshot.statistics("traceback")
+    )
+    return "".join(f"{line}\n" for line in lines)
+
+
+def diff_profiles(before, after, limit=PROFILE_DIFF_ROWS):
+    """
+    Compare the cumulative time per function of two pstats files.
+
+    Args:
+        before (str or Path): pstats file of the earlier run.
+        after (str or Path): pstats file of the later run.
+        limit (int): Number of functions returned.
+
+    Returns:
+        DataFrame: Functions with the largest absolute change in cumulative
+            seconds, with their before and after seconds and call counts.
+    """
+    import pstats
+
+    def cumulative(path):
+        stats = pstats.Stats(str(path)).stats
+        return pd.DataFrame(
+            {
+                "calls": [values[1] for values in stats.values()],
+                "seconds": [values[3] for values in stats.values()],
+            },
+            index=[pstats.func_std_string(function) for function in stats],
+        )
+
+    diff = cumulative(before).join(
+        cumulative(after), how="outer", lsuffix="_before", rsuffix="_after"
+    )
+    diff = diff.fillna(0)
+    diff["seconds_change"] = diff["seconds_after"] - diff["seconds_before"]
+    order = diff["seconds_change"].abs().sort_values(ascending=False).index
+    return diff.loc[order[:limit]]
+
+
+def diff_snapshots(before, after, limit=PROFILE_DIFF_ROWS):
+    """
+    Compare the allocations per source line of two tracemalloc snapshots.
+
+    Args:
+        before (str or Path): Snapshot file of the earlier run.
+        after (str or Path): Snapshot file of the later run.
+        limit (int): Number of source lines returned.
+
+    Returns:
+        DataFrame: Source lines with the largest change in allocated bytes,
+            with their size and block count after and the changes.
+    """
+    changes = tracemalloc.Snapshot.load(str(after)).compare_to(
+        tracemalloc.Snapshot.load(str(before)), "lineno"
+    )[:limit]
+    return pd.DataFrame(
+        {
+            "size_bytes": [change.size for change in changes],
+            "size_change_bytes": [change.size_diff for change in changes],
+            "count": [change.count for change in changes],
+            "count_change": [change.count_diff for change in changes],
+        },
+        index=[str(change.traceback) for change in changes],
+    )
+
+
+def main():
+    """Print the difference between two captures given on the command line."""
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.profiling BEFORE AFTER")
+        return
+
+    before, after = sys.argv[1:]
+    if before.endswith(".pstats"):
+        diff = diff_profiles(before, after)
+    else:
+        diff = diff_snapshots(before, after)
+    with pd.option_context(
+        "display.max_colwidth", 80, "display.max_columns", None, "display.width", 200
+    ):
+        print(diff)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+query.py
+Module for combined filter queries over precomputed recipe indexes.
+
+Every filter (a text word, a numeric range, a cluster) knows how many recipes
+it matches before materializing them. The most selective filter produces the
+candidate positions and the remaining filters are checked on those candidates
+only, so the cost is bounded by the smallest filter rather than by the
+broadest one (e.g. a common word such as "chicken").
+"""
+
+import numpy as np
+
+
+class RangeFilter:
+    """Recipes whose column value lies in [low, high], via a sorted index."""
+
+    def __init__(self, index, low=None, high=None):
+        """
+        Locate the range in the sorted column.
+
+        Args:
+            index (NumericIndex): Sorted index of the column.
+            low (float): Inclusive lower bound (None for no bound).
+            high (float): Inclusive upper bound (None for no bound).
+        """
+        self.index = index
+        self.low = low
+        self.high = high
+        self.size = index.count(low, high)
+
+    def positions(self):
+        """Return the matching positions in ascending order."""
+        return np.sort(self.index.range(self.low, self.high))
+
+    def contains(self, candidates):
+        """Return a mask of the candidates passing the filter."""
+        return self.index.contains(candidates, self.low, self.high)
+
+
+class PostingFilter:
+    """Recipes appearing in any of several sorted posting lists."""
+
+    def __init__(self, lists):
+        """
+        Args:
+            lists (list): Sorted arrays of recipe positions.
+        """
+        self.lists = [postings for postings in lists if len(postings)]
+        self.size = sum(len(postings) for postings in self.lists)
+
+    def positions(self):
+        """Return the matching positions in ascending order."""
+        if not self.lists:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(self.lists))
+
+    def contains(self, candidates):
+        """Return a mask of the candidates passing the filter."""
+        mask = np.zeros(len(candidates), dtype=bool)
+        for postings in self.lists:
+            found = np.searchsorted(postings, candidates)
+            found[found == len(postings)] = 0
+            mask |= postings[found] == candidates
+        return mask
+
+
+class ClusterFilter:
+    """Recipes of one cluster, via the per-cluster candidate lists."""
+
+    def __init__(self, clusters, cluster_order, cluster_offsets, cluster):
+        """
+        Args:
+            clusters (np.ndarray): Cluster label per recipe position.
+            cluster_order (np.ndarray): Positions grouped by cluster.
+            cluster_offsets (np.ndarray): Start of each cluster in cluster_order.
+            cluster (int): Cluster to keep.
+        """
+        self.clusters = clusters
+        self.cluster = cluster
+        self.members = cluster_order[
+            cluster_offsets[cluster] : cluster_offsets[cluster + 1]
+        ]
+        self.size = len(self.members)
+
+    def positions(self):
+        """Return the matching positions in ascending order."""
+        return np.sort(self.members)
+
+    def contains(self, candidates):
+        """Return a mask of the candidates passing the filter."""
+        return self.clusters[candidates] == self.cluster
+
+
+def select_candidates(filters, n_recipes):
+    """
+    Intersect filters, materializing only the most selective one.
+
+    Args:
+        filters (list): RangeFilter, PostingFilter or ClusterFilter objects.
+        n_recipes (int): Number of recipes (used when there is no filter).
+
+    Returns:
+        np.ndarray: Positions passing every filter, in ascending order.
+    """
+    if not filters:
+        return np.arange(n_recipes)
+
+    filters = sorted(filters, key=lambda item: item.size)
+    candidates = filters[0].positions()
+    for item in filters[1:]:
+        if len(candidates) == 0:
+            break
+        candidates = candidates[item.contains(candidates)]
+    return candidates
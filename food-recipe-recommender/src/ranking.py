@@ -0,0 +1,202 @@
+"""
+ranking.py
+Module for multi-objective ranking of recommendation candidates.
+
+Scores are costs (lower is better):
+
+    score = w_distance * distance + w_rating * (5 - avg_rating)
+            + w_popularity * (1 - log1p(num_interactions) / log1p(max_interactions))
+            - w_personal * affinity
+
+The distance is the Euclidean distance in (minutes, complexity_score) units, so a
+rating weight of 2.0 trades one star of average rating for two minutes (or
+complexity points) of distance. With the rating and popularity weights at 0 the
+ranking is the plain distance ordering; candidate lists are pre-sorted by the
+default static cost, so equal scores go to the better-rated, more popular recipe.
+The affinity term (in [-1, 1]) is only present for users with ratings (see
+personalization.py).
+"""
+
+import numpy as np
+
+# Default weight per ranking signal
+DEFAULT_RANKING_WEIGHTS = {
+    "distance": 1.0,
+    "rating": 2.0,
+    "popularity": 1.0,
+    "personal": 5.0,
+}
+
+# Signals folded into the precomputed static costs
+STATIC_SIGNALS = ("rating", "popularity")
+
+# Highest possible average rating, used to turn ratings into costs
+MAX_RATING = 5.0
+
+# Candidates considered by MMR re-ranking, as a multiple of the requested count
+MMR_POOL_FACTOR = 5
+
+
+def resolve_weights(weights=None):
+    """
+    Merge user-supplied ranking weights with the defaults.
+
+    Args:
+        weights (dict): Partial mapping of signal name to weight.
+
+    Returns:
+        dict: Complete weight mapping.
+
+    Raises:
+        ValueError: If a signal is unknown or a weight is negative
+    """
+    resolved = dict(DEFAULT_RANKING_WEIGHTS)
+    if weights:
+        unknown = set(weights) - set(resolved)
+        if unknown:
+            raise ValueError(f"Unknown ranking signals: {unknown}")
+        resolved.update(weights)
+
+    if any(weight < 0 for weight in resolved.values()):
+        raise ValueError("Ranking weights must be non-negative")
+
+    return resolved
+
+
+def static_costs(
+    n_recipes, avg_rating, num_interactions, weights, max_log_interactions
+):
+    """
+    Compute the query-independent part of each recipe's score.
+
+    Args:
+        n_recipes (int): Number of recipes.
+        avg_rating (np.ndarray): Average rating per recipe (or None).
+        num_interactions (np.ndarray): Interaction count per recipe (or None).
+        weights (dict): Resolved ranking weights.
+        max_log_interactions (float): log1p of the largest interaction count.
+
+    Returns:
+        np.ndarray: float64 cost per recipe (all zero if both signals are absent).
+    """
+    costs = np.zeros(n_recipes, dtype=np.float64)
+
+    if avg_rating is not None and weights["rating"]:
+        costs += weights["rating"] * (MAX_RATING - avg_rating.astype(np.float64))
+
+    if num_interactions is not None and weights["popularity"] and max_log_interactions:
+        popularity = np.log1p(num_interactions.astype(np.float64))
+        costs += weights["popularity"] * (1.0 - popularity / max_log_interactions)
+
+    return costs
+
+
+def group_by_cluster(clusters, n_clusters, sort_key):
+    """
+    Build per-cluster candidate lists, each pre-sorted by a key.
+
+    Args:
+        clusters (np.ndarray): Cluster label per recipe.
+        n_clusters (int): Number of clusters.
+        sort_key (np.ndarray): Secondary sort key within a cluster.
+
+    Returns:
+        tuple: (order, offsets) where order[offsets[c]:offsets[c + 1]] are the
+            positions of cluster c's recipes sorted by sort_key.
+    """
+    order = np.lexsort((sort_key, clusters))
+    offsets = np.zeros(n_clusters + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(clusters, minlength=n_clusters))
+    return order, offsets
+
+
+def top_k_smallest(scores, k):
+    """
+    Select the k smallest scores in O(n + k log k).
+
+    Ties are broken by position, like DataFrame.nsmallest(keep="first").
+
+    Args:
+        scores (np.ndarray): Candidate scores.
+        k (int): Number of candidates to keep.
+
+    Returns:
+        np.ndarray: Indices of the k best candidates, best first.
+    """
+    if k >= len(scores):
+        return np.argsort(scores, kind="stable")
+
+    kth = np.partition(scores, k - 1)[k - 1]
+    below = np.flatnonzero(scores < kth)
+    ties = np.flatnonzero(scores == kth)[: k - len(below)]
+    chosen = np.concatenate([below, ties])
+    return chosen[np.argsort(scores[chosen], kind="stable")]
+
+
+def top_k_per_row(rows, columns, scores, k):
+    """
+    Keep the k highest-scoring entries of each row of a sparse score list.
+
+    Ties go to the lower column, so results do not depend on entry order.
+
+    Args:
+        rows (np.ndarray): Row of each entry.
+        columns (np.ndarray): Column of each entry.
+        scores (np.ndarray): Score of each entry (higher is better).
+        k (int): Entries kept per row.
+
+    Returns:
+        tuple: (rows, columns, scores) of the kept entries, sorted by row and
+            then by descending score.
+    """
+    order = np.lexsort((columns, -scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+    keep = rank < k
+    return rows[keep], columns[keep], scores[keep]
+
+
+def mmr_rerank(scores, features, k, diversity):
+    """
+    Re-rank candidates with maximal marginal relevance.
+
+    Each pick maximizes (1 - diversity) * relevance - diversity * similarity to
+    the recipes already picked, where relevance is the normalized negative
+    score and similarity is exp(-distance) in the given feature space.
+
+    Args:
+        scores (np.ndarray): Candidate scores (lower is better).
+        features (np.ndarray): Candidate feature rows, e.g. scaled features.
+        k (int): Number of candidates to return.
+        diversity (float): Trade-off in [0, 1]; 0 keeps the score ordering.
+
+    Returns:
+        np.ndarray: Indices of the selected candidates, in pick order.
+    """
+    pool = top_k_smallest(scores, k * MMR_POOL_FACTOR)
+    if diversity <= 0 or len(pool) <= 1:
+        return pool[:k]
+
+    pool_scores = scores[pool]
+    spread = pool_scores.max() - pool_scores.min()
+    relevance = 1.0 - (pool_scores - pool_scores.min()) / (spread or 1.0)
+    pool_features = features[pool]
+
+    selected = [0]
+    max_similarity = np.exp(-np.linalg.norm(pool_features - pool_features[0], axis=1))
+    available = np.ones(len(pool), dtype=bool)
+    available[0] = False
+
+    while len(selected) < min(k, len(pool)):
+        mmr = (1 - diversity) * relevance - diversity * max_similarity
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(
+            max_similarity,
+            np.exp(-np.linalg.norm(pool_features - pool_features[pick], axis=1)),
+            out=max_similarity,
+        )
+
+    return pool[selected]
@@ -1,41 +1,78 @@
 """Module Imports"""
 
 import joblib
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
 from .config import (
     RECIPE_RECOMMENDER_MODEL_PATH,
     SCALER_MODEL_PATH,
-    MODELS_RELATIVE_SCALER_PATH,
 )
+from .cluster_kernel import ClusterAssigner
+from .fuzzy_search import TrigramIndex, tokenize
+from .neighbours import build_neighbour_graph, neighbours_of, subset_neighbour_graph
+from .numeric_index import GridIndex, NumericIndex
+from .query import ClusterFilter, PostingFilter, RangeFilter, select_candidates
+from .ingredient_stats import compute_ingredient_stats
+from .personalization import (
+    build_personalization,
+    subset_personalization,
+    user_affinity,
+)
+from .profiling import profiled
+from .ranking import (
+    STATIC_SIGNALS,
+    group_by_cluster,
+    mmr_rerank,
+    resolve_weights,
+    static_costs,
+    top_k_smallest,
+)
+from .storage import cluster_label_dtype, compact_recipe_frame, memory_breakdown
+from .thread_budget import limit_threads
 from .validation_checks import (
-    validate_input_data,
+    check_dataframe,
     validate_numeric_range,
     validate_clustering_inputs,
-    validate_recipe_df_schema,
 )
 
+# Layout of a saved model; bump it whenever the stored attributes change, so a
+# model saved in an older layout is rejected on load instead of failing on its
+# first query (models saved before versioning count as version 1)
+MODEL_FORMAT_VERSION = 2
+
 
 class RecipeRecommender:
     """K-Nearest Neighbors based recipe recommender system."""
 
-    def __init__(self, recipes_df, n_clusters=6):
+    @profiled("build_model")
+    def __init__(
+        self,
+        recipes_df,
+        n_clusters=6,
+        validation_sample_size=None,
+        interactions=None,
+        save=True,
+    ):
         """
         Initialize the KNN-based recipe recommendation system.
 
         Args:
             recipes_df (DataFrame): Preprocessed recipes DataFrame.
             k (int): Number of neighbors to use in KNN (default: 5).
+            validation_sample_size (int): Validate only a random sample of this
+                many rows (default: validate every row).
+            interactions (DataFrame): User ratings (user_id, recipe_id, rating)
+                used for personalized recommendations; requires an "id" column
+                in recipes_df.
+            save (bool): Save the trained model to the models directory
+                (default: True).
         """
-        validate_recipe_df_schema(recipes_df)
-        validate_input_data(recipes_df)
+        check_dataframe(recipes_df, sample_size=validation_sample_size)
         validate_clustering_inputs(n_clusters, len(recipes_df))
 
-        self.data = recipes_df.copy()  # Store dataset
-        self.scaler = StandardScaler()
+        self.data = compact_recipe_frame(recipes_df)  # Store compact dataset
+        self.scaler = None  # Scaler and k-means are fitted in _prepare_data
         self.kmeans = None  # KNN model will be trained later
+        self.cluster_assigner = None  # sklearn-free serving kernel
         self.feature_names = ["minutes", "complexity_score"]
         self.n_clusters = n_clusters
 
@@ -43,34 +80,165 @@ class RecipeRecommender:
         if not set(self.feature_names).issubset(self.data.columns):
             raise ValueError(f"Missing required columns: {self.feature_names}")
 
+        if interactions is not None and "id" not in self.data.columns:
+            raise ValueError("Personalization needs the recipe id column")
+
         # Prepare data and train model
-        self._prepare_data()
+        self._prepare_data(interactions)
+        if save:
+            self._save_model()
 
-    def _prepare_data(self):
-        """Preprocess the dataset and train the k-means model."""
-        # Select relevant features
-        self.features = self.data[self.feature_names]
+    def __getstate__(self):
+        """
+        Pickle the model without its sklearn estimators.
 
-        # Normalize features
-        self.features_scaled = pd.DataFrame(
-            self.scaler.fit_transform(self.features),
-            columns=self.feature_names,  # Explicitly set feature names
-        )
+        Serving only needs the arrays held by the cluster assigner, so loading a
+        saved model does not import sklearn.
+        """
+        state = self.__dict__.copy()
+        state["scaler"] = None
+        state["kmeans"] = None
+        state["format_version"] = MODEL_FORMAT_VERSION
+        return state
 
-        self._train_kmeans()
+    def __setstate__(self, state):
+        """
+        Restore a pickled model, checking that it was saved in the current layout.
+
+        Raises:
+            ValueError: If the model was saved in another layout and must be retrained
+        """
+        state = dict(state)
+        version = state.pop("format_version", 1)
+        if version != MODEL_FORMAT_VERSION:
+            raise ValueError(
+                f"Saved model has format version {version}, but this code expects "
+                f"version {MODEL_FORMAT_VERSION}; retrain the model with main.py"
+            )
+        self.__dict__.update(state)
+
+    def _prepare_data(self, interactions=None):
+        """
+        Preprocess the dataset and train the k-means model.
 
-    def _train_kmeans(self):
+        Args:
+            interactions (DataFrame): User ratings for personalization (optional).
+        """
+        # Training dependencies are imported only when a model is built
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+
+        # Select relevant features and normalize them in place (kept only during
+        # training), without an intermediate feature frame
+        features_scaled = np.column_stack(
+            [self.data[name].to_numpy(dtype=np.float64) for name in self.feature_names]
+        )
+        self.scaler.fit(features_scaled)
+        features_scaled = self.scaler.transform(features_scaled, copy=False)
+
+        # Training may use every core (see thread_budget.py)
+        with limit_threads("training"):
+            self._train_kmeans(features_scaled)
+            self._build_ranking_index()
+            self.neighbour_graph = build_neighbour_graph(
+                self.data["ingredients"], features_scaled
+            )
+            self.personalization = (
+                build_personalization(interactions, self._column_array("id"))
+                if interactions is not None
+                else None
+            )
+        self._build_search_index()
+        self._build_query_index()
+
+    def _train_kmeans(self, features_scaled):
         """
         Train the k-means model.
+
+        Args:
+            features_scaled (np.ndarray): Standardized training features.
         """
+        from sklearn.cluster import KMeans
+
         # Train k-means
         self.kmeans = KMeans(n_clusters=self.n_clusters, random_state=42)
-        self.kmeans.fit(self.features_scaled)
+        self.kmeans.fit(features_scaled)
+
+        # Keep the fitted parameters as plain arrays for sklearn-free serving
+        self.cluster_assigner = ClusterAssigner.from_estimators(
+            self.scaler, self.kmeans
+        )
+
+        # labels_ come from a final assignment pass, so the kernel should match
+        # them; rounding can still flip near-ties, which is reported but not
+        # fatal (tests/test_cluster_kernel.py requires an exact match)
+        mismatches = np.count_nonzero(
+            self.cluster_assigner.predict(features_scaled) != self.kmeans.labels_
+        )
+        if mismatches:
+            print(
+                f"Warning: cluster kernel disagrees with KMeans on {mismatches} "
+                "recipes; keeping the KMeans labels"
+            )
+
+        # Add cluster assignments to data (labels_ are the source of truth)
+        self.data["cluster"] = self.kmeans.labels_.astype(
+            cluster_label_dtype(self.n_clusters)
+        )
+
+        # Cache ingredient statistics with the model so EDA can reuse them
+        self.ingredient_stats = compute_ingredient_stats(
+            self.data["ingredients"], self.data["cluster"]
+        )
+
+    def _column_array(self, column):
+        """Return a column as a NumPy array, or None if the column is absent."""
+        if column not in self.data.columns:
+            return None
+        return self.data[column].to_numpy()
+
+    def _build_ranking_index(self):
+        """Precompute static ranking costs and per-cluster candidate lists."""
+        num_interactions = self._column_array("num_interactions")
+        self.max_log_interactions = (
+            float(np.log1p(num_interactions.max()))
+            if num_interactions is not None and len(num_interactions)
+            else 0.0
+        )
+        self.ranking_weights = resolve_weights()
+        self.static_cost = static_costs(
+            len(self.data),
+            self._column_array("avg_rating"),
+            num_interactions,
+            self.ranking_weights,
+            self.max_log_interactions,
+        )
+
+        # Recipes grouped by cluster, best static cost first within each cluster
+        self.cluster_order, self.cluster_offsets = group_by_cluster(
+            self.data["cluster"].to_numpy(), self.n_clusters, self.static_cost
+        )
 
-        # Add cluster assignments to data
-        self.data["cluster"] = self.kmeans.labels_
+    def _build_search_index(self):
+        """Build the trigram index used by typo-tolerant search."""
+        self.search_index = TrigramIndex(self.data["name"], self.data["ingredients"])
+
+    def _build_query_index(self):
+        """Build sorted indexes of the numeric filter columns and a 2-D grid."""
+        self.numeric_indexes = {}
+        for column in ["minutes", "complexity_score", "avg_rating"]:
+            values = self._column_array(column)
+            if values is not None:
+                self.numeric_indexes[column] = NumericIndex(values)
+
+        # Grid over the preference space for "within X" queries
+        self.preference_grid = GridIndex(
+            self._column_array("minutes"), self._column_array("complexity_score")
+        )
 
-        # Save the trained model safely
+    def _save_model(self):
+        """Save the trained model and scaler."""
         try:
             joblib.dump(self, str(RECIPE_RECOMMENDER_MODEL_PATH))
             joblib.dump(self.scaler, str(SCALER_MODEL_PATH))  # Save scaler too
@@ -78,78 +246,485 @@ class RecipeRecommender:
         except FileNotFoundError as e:
             print(f"Error saving model: {e}")
 
-    def recommend_recipes(self, desired_time, desired_complexity, n_recommendations=5):
+    @profiled("recommend")
+    def recommend_recipes(
+        self,
+        desired_time,
+        desired_complexity,
+        n_recommendations=5,
+        weights=None,
+        diversity=0.0,
+        user_id=None,
+    ):
         """
         Recommend recipes based on user's preferred time and complexity.
 
         Args:
             desired_time (int): Preferred cooking time in minutes.
             desired_complexity (int): Preferred complexity score.
+            n_recommendations (int): Number of recipes to return.
+            weights (dict): Ranking weights overriding DEFAULT_RANKING_WEIGHTS
+                ("distance", "rating", "popularity", "personal").
+            diversity (float): MMR diversity trade-off in [0, 1] (0 disables).
+            user_id (int): Food.com user whose ratings personalize the ranking
+                (None, or a user without ratings, gets the generic ranking).
+
+        Returns:
+            DataFrame: Top K recipes by ranking score.
+        """
+        desired_time, desired_complexity = self._validate_preferences(
+            desired_time, desired_complexity
+        )
+        weights, diversity = self._validate_ranking(
+            n_recommendations, weights, diversity
+        )
+        affinity = self._user_affinity(user_id)
+
+        # Scale user input and find the nearest cluster
+        cluster = self.cluster_assigner.assign_one(desired_time, desired_complexity)
+
+        [recommendations] = self._rank_cluster(
+            cluster,
+            np.array([[desired_time, desired_complexity]], dtype=np.float64),
+            n_recommendations,
+            weights,
+            diversity,
+            [affinity],
+        )
+        return recommendations
+
+    @profiled("recommend")
+    def recommend_recipes_batch(
+        self,
+        preferences,
+        n_recommendations=5,
+        weights=None,
+        diversity=0.0,
+        user_ids=None,
+    ):
+        """
+        Recommend recipes for many preference points in one vectorized pass.
+
+        Queries are assigned to clusters together and every cluster's candidate
+        distances are computed for all of its queries at once. Each result is the
+        same as recommend_recipes would return for that query.
+
+        Args:
+            preferences (iterable): (desired_time, desired_complexity) pairs.
+            n_recommendations (int): Number of recipes to return per query.
+            weights (dict): Ranking weights overriding DEFAULT_RANKING_WEIGHTS.
+            diversity (float): MMR diversity trade-off in [0, 1] (0 disables).
+            user_ids (list): User id (or None) per query, for personalization.
 
         Returns:
-            DataFrame: Top K nearest recipes.
+            list: DataFrame of recommendations per query, in input order.
         """
-        # Validate inputs
+        preferences = np.array(
+            [self._validate_preferences(*preference) for preference in preferences],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        weights, diversity = self._validate_ranking(
+            n_recommendations, weights, diversity
+        )
+        if user_ids is None:
+            affinities = [None] * len(preferences)
+        elif len(user_ids) != len(preferences):
+            raise ValueError("Expected one user id per preference")
+        else:
+            affinities = [self._user_affinity(user_id) for user_id in user_ids]
+
+        clusters = self.cluster_assigner.assign(preferences)
+        results = [None] * len(preferences)
+        for cluster in np.unique(clusters):
+            rows = np.flatnonzero(clusters == cluster)
+            ranked = self._rank_cluster(
+                int(cluster),
+                preferences[rows],
+                n_recommendations,
+                weights,
+                diversity,
+                [affinities[row] for row in rows],
+            )
+            for row, recommendations in zip(rows, ranked):
+                results[row] = recommendations
+        return results
+
+    @staticmethod
+    def _validate_preferences(desired_time, desired_complexity):
+        """Validate one (desired_time, desired_complexity) query."""
         desired_time = validate_numeric_range(
             desired_time, 0, 300, "desired cooking time"
         )
         desired_complexity = validate_numeric_range(
             desired_complexity, 0, 100, "desired complexity"
         )
+        return desired_time, desired_complexity
+
+    def _validate_ranking(self, n_recommendations, weights, diversity):
+        """
+        Validate the ranking options shared by every recommend call.
 
+        Returns:
+            tuple: (resolved weights, diversity).
+        """
         if not isinstance(n_recommendations, int) or n_recommendations < 1:
             raise ValueError("Number of recommendations must be a positive integer")
 
-        if self.kmeans is None:
+        if self.cluster_assigner is None:
             raise ValueError("kmeans model is not trained yet.")
 
-        # Load the scaler to ensure consistent transformations
-        try:
-            self.scaler = joblib.load(str(MODELS_RELATIVE_SCALER_PATH))
-        except FileNotFoundError as e:
-            print(f"Error loading scaler: {e}")
+        diversity = validate_numeric_range(diversity, 0, 1, "diversity")
+        return resolve_weights(weights), diversity
+
+    def _validate_user(self, user_id):
+        """Check that a user id can personalize this model's rankings."""
+        if user_id is None:
+            return
+        if isinstance(user_id, bool) or not isinstance(user_id, (int, np.integer)):
+            raise ValueError("User id must be an integer")
+        if getattr(self, "personalization", None) is None:
+            raise ValueError("Model was built without interactions")
+
+    def _user_affinity(self, user_id):
+        """
+        Look up a user's affinity for the recipes similar to ones they rated.
+
+        Returns:
+            tuple: (positions, affinities), or None for no or an unknown user.
+        """
+        self._validate_user(user_id)
+        if user_id is None:
             return None
+        return user_affinity(self.personalization, user_id)
+
+    def _rank_cluster(
+        self,
+        cluster,
+        preferences,
+        n_recommendations,
+        weights,
+        diversity,
+        affinities=None,
+    ):
+        """
+        Rank one cluster's recipes for one or more preference points.
 
-        # Create DataFrame with feature names before scaling
-        user_input = pd.DataFrame(
-            [[desired_time, desired_complexity]],
-            columns=self.feature_names,  # Use same feature names as training
+        Args:
+            cluster (int): Cluster the preference points were assigned to.
+            preferences (np.ndarray): float64 (desired_time, desired_complexity)
+                rows, shape (n_queries, 2).
+            n_recommendations (int): Number of recipes to return per query.
+            weights (dict): Resolved ranking weights.
+            diversity (float): MMR diversity trade-off in [0, 1].
+            affinities (list): Result of _user_affinity (or None) per row.
+
+        Returns:
+            list: DataFrame of recommendations per preference row.
+        """
+        # Candidate positions of the cluster's recipes (precomputed at build time)
+        positions = self.cluster_order[
+            self.cluster_offsets[cluster] : self.cluster_offsets[cluster + 1]
+        ]
+
+        # Calculate distance to user preferences (in float64, since the stored
+        # columns use compact integer dtypes), one row per query
+        minutes = self._column_array("minutes")[positions].astype(np.float64)
+        complexity = self._column_array("complexity_score")[positions].astype(
+            np.float64
+        )
+        distances = np.hypot(
+            minutes - preferences[:, :1], complexity - preferences[:, 1:]
         )
 
-        # Scale user input
-        user_input_scaled = pd.DataFrame(
-            self.scaler.transform(user_input),
-            columns=self.feature_names,  # Maintain feature names after scaling
+        # Blend in rating and popularity, reusing the precomputed costs if possible
+        if all(
+            weights[signal] == self.ranking_weights[signal] for signal in STATIC_SIGNALS
+        ):
+            costs = self.static_cost[positions]
+        else:
+            avg_rating = self._column_array("avg_rating")
+            num_interactions = self._column_array("num_interactions")
+            costs = static_costs(
+                len(positions),
+                avg_rating[positions] if avg_rating is not None else None,
+                num_interactions[positions] if num_interactions is not None else None,
+                weights,
+                self.max_log_interactions,
+            )
+        scores = weights["distance"] * distances + costs
+
+        # Lower the cost of recipes similar to ones the user rated highly
+        for row, affinity in enumerate(affinities or []):
+            if affinity is None or not len(affinity[0]) or not weights["personal"]:
+                continue
+            recipes, values = affinity
+            found = np.searchsorted(recipes, positions)
+            found[found == len(recipes)] = 0
+            matched = recipes[found] == positions
+            scores[row, matched] -= weights["personal"] * values[found[matched]]
+
+        if diversity > 0:
+            features = self.cluster_assigner.transform(
+                np.column_stack([minutes, complexity])
+            )
+
+        # Bounded top-k selection, optionally diversified with MMR
+        picks = []
+        for query_scores in scores:
+            if diversity > 0:
+                picks.append(
+                    mmr_rerank(query_scores, features, n_recommendations, diversity)
+                )
+            else:
+                picks.append(top_k_smallest(query_scores, n_recommendations))
+
+        # Build one frame for all queries and slice it, which is much cheaper
+        # than building a frame per query
+        rows = np.repeat(np.arange(len(picks)), [len(pick) for pick in picks])
+        columns = np.concatenate(picks)
+        ranked = self.data.iloc[positions[columns]].assign(
+            similarity_distance=distances[rows, columns],
+            ranking_score=scores[rows, columns],
         )
+        if len(picks) == 1:
+            return [ranked]
 
-        # Find nearest cluster
-        cluster = self.kmeans.predict(user_input_scaled)[0]
+        bounds = np.cumsum([0] + [len(pick) for pick in picks])
+        return [ranked.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
 
-        # Get recipes from cluster and sort by similarity to preferences
-        cluster_recipes = self.data[self.data["cluster"] == cluster].copy()
+    def subset(self, positions):
+        """
+        Build a serving copy of the trained model restricted to some recipes.
+
+        The copy shares the fitted cluster assigner and ranking parameters, so
+        its results are the same as the full model's restricted to those
+        recipes. Used to build shards without retraining.
+
+        Args:
+            positions (np.ndarray): Row positions of the recipes to keep.
 
-        # Calculate distance to user preferences for sorting
-        cluster_recipes["similarity_distance"] = cluster_recipes.apply(
-            lambda x: np.sqrt(
-                (x["minutes"] - desired_time) ** 2
-                + (x["complexity_score"] - desired_complexity) ** 2
-            ),
-            axis=1,
+        Returns:
+            RecipeRecommender: Model serving only the selected recipes.
+        """
+        part = object.__new__(RecipeRecommender)
+        part.__setstate__(self.__getstate__())
+        part.data = self.data.iloc[positions]
+        part.ingredient_stats = None
+        part.static_cost = self.static_cost[positions]
+        part.cluster_order, part.cluster_offsets = group_by_cluster(
+            part.data["cluster"].to_numpy(), self.n_clusters, part.static_cost
         )
+        part.neighbour_graph = subset_neighbour_graph(self.neighbour_graph, positions)
+        if getattr(self, "personalization", None) is not None:
+            part.personalization = subset_personalization(
+                self.personalization, positions
+            )
+        part._build_search_index()
+        part._build_query_index()
+        return part
+
+    def query(
+        self,
+        text=None,
+        minutes=None,
+        complexity=None,
+        min_rating=None,
+        cluster=None,
+        preferences=None,
+        n_results=10,
+        fuzzy=False,
+    ):
+        """
+        Find recipes matching text and numeric filters, ranked by preference.
+
+        Every filter is answered from a precomputed index (token posting lists,
+        sorted numeric columns, per-cluster lists) and only the most selective
+        one is materialized, e.g. "quick chicken recipes" is
+        query("chicken", minutes=(None, 20)).
 
-        # Sort by similarity and return top n
-        recommendations = cluster_recipes.nsmallest(
-            n_recommendations, "similarity_distance"
+        Args:
+            text (str): Words that must all appear in the name or ingredients.
+            minutes (tuple): Inclusive (low, high) cooking time; None for an
+                open bound.
+            complexity (tuple): Inclusive (low, high) complexity score.
+            min_rating (float): Minimum average rating.
+            cluster (int): Only recipes of this cluster.
+            preferences (tuple): (desired_time, desired_complexity) to rank by
+                distance; without it recipes are ranked by rating and popularity.
+            n_results (int): Maximum number of results to return.
+            fuzzy (bool): Let text words match with typos.
+
+        Returns:
+            DataFrame: Matching recipes, best ranking_score first.
+        """
+        if not isinstance(n_results, int) or n_results < 1:
+            raise ValueError("Number of results must be a positive integer")
+
+        filters = []
+        if text is not None:
+            if not isinstance(text, str) or not tokenize(text):
+                raise ValueError("Query text must contain at least one word")
+            for word in dict.fromkeys(tokenize(text)):
+                filters.append(
+                    PostingFilter(self.search_index.word_postings(word, fuzzy))
+                )
+
+        ranges = {"minutes": minutes, "complexity_score": complexity}
+        if min_rating is not None:
+            ranges["avg_rating"] = (min_rating, None)
+        for column, bounds in ranges.items():
+            if bounds is None:
+                continue
+            index = self._numeric_index(column)
+            low, high = bounds
+            if low is not None and high is not None and low > high:
+                raise ValueError(f"Empty {column} range: {bounds}")
+            filters.append(RangeFilter(index, low, high))
+
+        if cluster is not None:
+            if cluster not in range(self.n_clusters):
+                raise ValueError(f"Cluster must be between 0 and {self.n_clusters - 1}")
+            filters.append(
+                ClusterFilter(
+                    self.data["cluster"].to_numpy(),
+                    self.cluster_order,
+                    self.cluster_offsets,
+                    cluster,
+                )
+            )
+
+        candidates = select_candidates(filters, len(self.data))
+
+        # Rank the filtered recipes like recommend_recipes does
+        scores = self.static_cost[candidates]
+        if preferences is not None:
+            desired_time, desired_complexity = self._validate_preferences(*preferences)
+            # In float64 like _rank_cluster, not the compact stored dtypes
+            minutes = self._column_array("minutes")[candidates].astype(np.float64)
+            complexity = self._column_array("complexity_score")[candidates].astype(
+                np.float64
+            )
+            distances = np.hypot(
+                minutes - desired_time, complexity - desired_complexity
+            )
+            scores = self.ranking_weights["distance"] * distances + scores
+
+        picks = top_k_smallest(scores, n_results)
+        columns = {}
+        if preferences is not None:
+            columns["similarity_distance"] = distances[picks]
+        columns["ranking_score"] = scores[picks]
+        return self.data.iloc[candidates[picks]].assign(**columns)
+
+    def _numeric_index(self, column):
+        """Return the sorted index of a column, or raise if it is not indexed."""
+        if column not in self.numeric_indexes:
+            raise ValueError(
+                f"No index on column {column}; indexed: {list(self.numeric_indexes)}"
+            )
+        return self.numeric_indexes[column]
+
+    def range_query(self, column, low=None, high=None):
+        """
+        Return the recipes whose column value lies in [low, high].
+
+        Uses the sorted index, so the cost is O(log n + k) for k matches
+        instead of a mask over every recipe.
+
+        Args:
+            column (str): "minutes", "complexity_score" or "avg_rating".
+            low (float): Inclusive lower bound (None for no bound).
+            high (float): Inclusive upper bound (None for no bound).
+
+        Returns:
+            DataFrame: Matching recipes ordered by the column value.
+        """
+        return self.data.iloc[self._numeric_index(column).range(low, high)]
+
+    def recipes_within(self, desired_time, desired_complexity, radius):
+        """
+        Return the recipes within a distance of a (time, complexity) point.
+
+        Args:
+            desired_time (int): Preferred cooking time in minutes.
+            desired_complexity (int): Preferred complexity score.
+            radius (float): Largest accepted distance, in the same units as
+                the similarity_distance of recommendations.
+
+        Returns:
+            DataFrame: Matching recipes, nearest first.
+        """
+        desired_time, desired_complexity = self._validate_preferences(
+            desired_time, desired_complexity
+        )
+        radius = validate_numeric_range(radius, 0, 400, "radius")
+        positions, distances = self.preference_grid.within(
+            desired_time, desired_complexity, radius
+        )
+        return self.data.iloc[positions].assign(similarity_distance=distances)
+
+    def similar_recipes(self, recipe, n_results=10):
+        """
+        Return the recipes most similar to a given one ("more like this").
+
+        Reads the neighbour graph precomputed at build time, so the cost does
+        not depend on the catalogue size.
+
+        Args:
+            recipe: Index label of the recipe in self.data.
+            n_results (int): Maximum number of recipes to return.
+
+        Returns:
+            DataFrame: Similar recipes with a similarity_score, most similar first.
+        """
+        if not isinstance(n_results, int) or n_results < 1:
+            raise ValueError("Number of results must be a positive integer")
+
+        if recipe not in self.data.index:
+            raise ValueError(f"Unknown recipe: {recipe}")
+
+        positions, scores = neighbours_of(
+            self.neighbour_graph, self.data.index.get_loc(recipe)
+        )
+        return self.data.iloc[positions[:n_results]].assign(
+            similarity_score=scores[:n_results]
         )
-        return recommendations
 
-    def search_recipes(self, search_query, n_results=10):
+    def memory_report(self):
+        """
+        Report the memory used by the loaded model.
+
+        Every attribute saved with the model is included (the sklearn
+        estimators are not saved, see __getstate__).
+
+        Returns:
+            pd.Series: Bytes per stored column and structure, with a "total"
+                entry.
+
+        Raises:
+            ValueError: If a stored structure cannot be measured
+        """
+        state = self.__getstate__()
+        data = state.pop("data")
+        return memory_breakdown(
+            data,
+            **{
+                name: value
+                for name, value in state.items()
+                if name not in ("scaler", "kmeans", "format_version")
+            },
+        )
+
+    @profiled("search")
+    def search_recipes(self, search_query, n_results=10, fuzzy=False):
         """
         Search recipes by name or ingredients.
 
         Args:
             search_query (str): Query string to search for in recipe names and ingredients.
             n_results (int): Maximum number of results to return.
+            fuzzy (bool): Match query words with typos (e.g. "chiken") against
+                name and ingredient words instead of exact substrings.
 
         Returns:
             DataFrame: Matching recipes sorted by relevance.
@@ -162,6 +737,13 @@ class RecipeRecommender:
 
         search_query = search_query.lower().strip()
 
+        if fuzzy:
+            positions, relevance = self.search_index.search(search_query)
+            picks = top_k_smallest(-relevance, n_results)
+            return self.data.iloc[positions[picks]].assign(
+                relevance_score=relevance[picks]
+            )
+
         # Search in recipe names and ingredients
         matches = self.data[
             self.data["name"].str.lower().str.contains(search_query, na=False)
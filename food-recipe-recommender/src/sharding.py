@@ -0,0 +1,295 @@
+"""
+sharding.py
+Module for serving a trained recommender from several local worker processes.
+
+Each shard process owns a partition of the recipes (by cluster or by a hash of
+the recipe index) together with its own ranking index. A coordinator assigns
+the query cluster, fans calls out to the shards that can answer them and merges
+their top-k results.
+"""
+
+import multiprocessing
+import os
+import threading
+import numpy as np
+import pandas as pd
+from .ranking import MMR_POOL_FACTOR, mmr_rerank
+from .thread_budget import limit_threads
+from .validation_checks import validate_numeric_range
+
+# Ways recipes can be partitioned across shards
+PARTITION_STRATEGIES = ("cluster", "hash")
+
+
+def _shard_worker(connection, shard, global_positions):
+    """
+    Serve method calls on one shard until the coordinator sends None.
+
+    Args:
+        connection: Pipe end connected to the coordinator.
+        shard (RecipeRecommender): Model restricted to this shard's recipes.
+        global_positions (np.ndarray): Position of each shard row in the full data.
+    """
+    # Shards run side by side, so each keeps to the serving thread budget
+    limit_threads("serving")
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        method, args, kwargs = message
+        try:
+            result = getattr(shard, method)(*args, **kwargs)
+            positions = global_positions[shard.data.index.get_indexer(result.index)]
+            connection.send(("ok", (result, positions)))
+        except Exception as e:  # Forward every failure instead of killing the shard
+            connection.send(("error", e))
+
+    connection.close()
+
+
+def partition_by_cluster(clusters, n_clusters, n_shards):
+    """
+    Assign whole clusters to shards, balancing the number of recipes per shard.
+
+    Args:
+        clusters (np.ndarray): Cluster label per recipe.
+        n_clusters (int): Number of clusters.
+        n_shards (int): Number of shards.
+
+    Returns:
+        np.ndarray: Shard id per cluster.
+    """
+    sizes = np.bincount(clusters, minlength=n_clusters)
+    loads = np.zeros(n_shards, dtype=np.int64)
+    owners = np.empty(n_clusters, dtype=np.int64)
+    for cluster in np.argsort(-sizes, kind="stable"):
+        owners[cluster] = int(np.argmin(loads))
+        loads[owners[cluster]] += sizes[cluster]
+    return owners
+
+
+def partition_by_hash(index, n_shards):
+    """
+    Assign recipes to shards by a stable hash of their index labels.
+
+    Args:
+        index (pd.Index): Recipe index labels.
+        n_shards (int): Number of shards.
+
+    Returns:
+        np.ndarray: Shard id per recipe.
+    """
+    return (pd.util.hash_array(index.to_numpy()) % n_shards).astype(np.int64)
+
+
+class ShardedRecommender:
+    """Coordinator fanning recommend and search calls out to shard processes."""
+
+    def __init__(self, recommender, n_shards=None, partition="cluster"):
+        """
+        Partition a trained recommender and start one worker process per shard.
+
+        Args:
+            recommender (RecipeRecommender): Trained model to shard.
+            n_shards (int): Number of shard processes (default: CPU count,
+                capped at the number of clusters when partitioning by cluster).
+            partition (str): "cluster" or "hash".
+
+        Raises:
+            ValueError: If the partition strategy or shard count is invalid
+        """
+        if partition not in PARTITION_STRATEGIES:
+            raise ValueError(f"Partition must be one of {PARTITION_STRATEGIES}")
+
+        if n_shards is None:
+            n_shards = os.cpu_count() or 1
+            if partition == "cluster":
+                n_shards = min(n_shards, recommender.n_clusters)
+        if not isinstance(n_shards, int) or n_shards < 1:
+            raise ValueError("Number of shards must be a positive integer")
+
+        self.partition = partition
+        self.n_shards = n_shards
+        self.cluster_assigner = recommender.cluster_assigner
+
+        clusters = recommender.data["cluster"].to_numpy()
+        if partition == "cluster":
+            self.cluster_owners = partition_by_cluster(
+                clusters, recommender.n_clusters, n_shards
+            )
+            shard_ids = self.cluster_owners[clusters]
+        else:
+            self.cluster_owners = None
+            shard_ids = partition_by_hash(recommender.data.index, n_shards)
+
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        self._locks = [threading.Lock() for _ in range(n_shards)]
+        for shard_id in range(n_shards):
+            positions = np.flatnonzero(shard_ids == shard_id)
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_shard_worker,
+                args=(child, recommender.subset(positions), positions),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _call(self, shard_ids, method, *args, **kwargs):
+        """
+        Run a method on several shards concurrently and collect their results.
+
+        Shard locks are always taken in ascending order, so concurrent callers
+        cannot deadlock, and queries touching different shards run in parallel.
+
+        Returns:
+            list: (result DataFrame, global positions) per shard.
+
+        Raises:
+            Exception: The first error raised by a shard
+        """
+        shard_ids = sorted(shard_ids)
+        for shard_id in shard_ids:
+            self._locks[shard_id].acquire()
+        try:
+            for shard_id in shard_ids:
+                self._connections[shard_id].send((method, args, kwargs))
+            replies = [self._connections[shard_id].recv() for shard_id in shard_ids]
+        finally:
+            for shard_id in shard_ids:
+                self._locks[shard_id].release()
+
+        for status, payload in replies:
+            if status == "error":
+                raise payload
+        return [payload for _, payload in replies]
+
+    def recommend_recipes(
+        self,
+        desired_time,
+        desired_complexity,
+        n_recommendations=5,
+        weights=None,
+        diversity=0.0,
+        user_id=None,
+    ):
+        """
+        Recommend recipes across shards (see RecipeRecommender.recommend_recipes).
+
+        Returns:
+            DataFrame: Top K recipes by ranking score.
+        """
+        desired_time = validate_numeric_range(
+            desired_time, 0, 300, "desired cooking time"
+        )
+        desired_complexity = validate_numeric_range(
+            desired_complexity, 0, 100, "desired complexity"
+        )
+        diversity = validate_numeric_range(diversity, 0, 1, "diversity")
+
+        if self.partition == "cluster":
+            # The whole cluster lives on one shard, which can answer alone
+            cluster = self.cluster_assigner.assign_one(desired_time, desired_complexity)
+            [(recommendations, _)] = self._call(
+                [self.cluster_owners[cluster]],
+                "recommend_recipes",
+                desired_time,
+                desired_complexity,
+                n_recommendations,
+                weights,
+                diversity,
+                user_id,
+            )
+            return recommendations
+
+        # Every shard returns its best candidates (a larger pool for MMR)
+        pool_size = n_recommendations * (MMR_POOL_FACTOR if diversity > 0 else 1)
+        candidates = self._merge(
+            self._call(
+                range(self.n_shards),
+                "recommend_recipes",
+                desired_time,
+                desired_complexity,
+                pool_size,
+                weights,
+                0.0,
+                user_id,
+            ),
+            "ranking_score",
+            ascending=True,
+        )
+
+        if diversity > 0:
+            features = self.cluster_assigner.transform(
+                candidates[["minutes", "complexity_score"]].to_numpy(dtype=np.float64)
+            )
+            picks = mmr_rerank(
+                candidates["ranking_score"].to_numpy(),
+                features,
+                n_recommendations,
+                diversity,
+            )
+            return candidates.iloc[picks]
+
+        return candidates.head(n_recommendations)
+
+    def search_recipes(self, search_query, n_results=10, fuzzy=False):
+        """
+        Search recipes on every shard (see RecipeRecommender.search_recipes).
+
+        Returns:
+            DataFrame: Matching recipes sorted by relevance.
+        """
+        results = self._call(
+            range(self.n_shards), "search_recipes", search_query, n_results, fuzzy
+        )
+        return self._merge(results, "relevance_score", ascending=False).head(n_results)
+
+    def query(self, n_results=10, **filters):
+        """
+        Run a filter query on every shard (see RecipeRecommender.query).
+
+        Returns:
+            DataFrame: Matching recipes, best ranking_score first.
+        """
+        results = self._call(
+            range(self.n_shards), "query", n_results=n_results, **filters
+        )
+        return self._merge(results, "ranking_score", ascending=True).head(n_results)
+
+    @staticmethod
+    def _merge(results, score_column, ascending):
+        """Concatenate shard results ordered by score, then by global position."""
+        frames = [frame for frame, _ in results if not frame.empty]
+        if not frames:
+            return results[0][0]
+
+        positions = np.concatenate(
+            [positions for frame, positions in results if not frame.empty]
+        )
+        merged = pd.concat(frames)
+        scores = merged[score_column].to_numpy(dtype=np.float64)
+        order = np.lexsort((positions, scores if ascending else -scores))
+        return merged.iloc[order]
+
+    def close(self):
+        """Stop every shard process."""
+        for connection, process in zip(self._connections, self._processes):
+            if process.is_alive():
+                connection.send(None)
+            process.join(timeout=5)
+            connection.close()
+        self._processes = []
+        self._connections = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
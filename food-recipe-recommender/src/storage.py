@@ -0,0 +1,151 @@
+"""
+storage.py
+Module for the compact in-memory representation of recipe data.
+"""
+
+import sys
+from importlib.util import find_spec
+import numpy as np
+import pandas as pd
+
+# Target dtypes for numeric recipe columns (used when the values fit)
+COMPACT_NUMERIC_DTYPES = {
+    "id": np.int32,
+    "minutes": np.int16,
+    "complexity_score": np.int16,
+    "num_interactions": np.int32,
+    "avg_rating": np.float32,
+    "cluster": np.int8,
+}
+
+# Large text columns stored as Arrow-backed strings when pyarrow is installed
+STRING_COLUMNS = ["name", "ingredients", "steps"]
+
+
+def string_storage_dtype():
+    """
+    Pick the most compact available dtype for text columns.
+
+    Returns:
+        str: "string[pyarrow]" if pyarrow is installed, otherwise "object".
+    """
+    if find_spec("pyarrow") is None:
+        return "object"
+    return "string[pyarrow]"
+
+
+def _fits(values, dtype):
+    """Return True if the values can be stored in dtype without loss."""
+    if np.issubdtype(dtype, np.floating):
+        return True
+    if values.isna().any():
+        return False
+    if not pd.api.types.is_integer_dtype(values):
+        numbers = values.to_numpy(dtype=np.float64)
+        if not np.array_equal(numbers, np.round(numbers)):
+            return False
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def compact_recipe_frame(recipes_df):
+    """
+    Build a memory-optimized copy of a recipes DataFrame.
+
+    Numeric columns are downcast to COMPACT_NUMERIC_DTYPES when their values
+    fit, text columns use Arrow-backed strings, and other columns are kept.
+    The frame is built column by column, so no full intermediate copy is made.
+
+    Args:
+        recipes_df (pd.DataFrame): Recipes DataFrame.
+
+    Returns:
+        pd.DataFrame: Compact copy with the same index and columns.
+    """
+    string_dtype = string_storage_dtype()
+    columns = {}
+    for col in recipes_df.columns:
+        values = recipes_df[col]
+        target = COMPACT_NUMERIC_DTYPES.get(col)
+        if target is not None and _fits(values, target):
+            columns[col] = values.astype(target)
+        elif col in STRING_COLUMNS and string_dtype != "object":
+            columns[col] = values.astype(string_dtype)
+        else:
+            columns[col] = values.copy()
+
+    return pd.DataFrame(columns, index=recipes_df.index)
+
+
+def cluster_label_dtype(n_clusters):
+    """
+    Return the smallest integer dtype that can hold every cluster label.
+
+    Args:
+        n_clusters (int): Number of clusters.
+
+    Returns:
+        np.dtype: Integer dtype for cluster labels.
+    """
+    return np.min_scalar_type(-n_clusters)
+
+
+def structure_nbytes(value):
+    """
+    Measure the memory held by a stored model structure.
+
+    Args:
+        value: None, a NumPy array (object arrays also count their items), a
+            Python or NumPy scalar or string, a dict, list or tuple of these,
+            or an object with an nbytes attribute (e.g. the search indexes).
+
+    Returns:
+        int: Bytes held by the value and everything it contains.
+
+    Raises:
+        ValueError: If the value, or anything it holds, cannot be measured
+    """
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(structure_nbytes(item) for item in value.flat)
+        return value.nbytes
+    if isinstance(value, (bool, int, float, str, bytes, np.generic)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            structure_nbytes(key) + structure_nbytes(item)
+            for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(structure_nbytes(item) for item in value)
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    raise ValueError(f"Cannot measure the memory of a {type(value).__name__}")
+
+
+def memory_breakdown(recipes_df, **structures):
+    """
+    Report the memory used by a recipes DataFrame and related structures.
+
+    Args:
+        recipes_df (pd.DataFrame): Recipes DataFrame.
+        **structures: Extra named structures to include (see structure_nbytes).
+
+    Returns:
+        pd.Series: Bytes per component, largest first, with a "total" entry.
+
+    Raises:
+        ValueError: If a structure cannot be measured
+    """
+    usage = recipes_df.memory_usage(deep=True, index=True)
+    usage.index = [f"data.{name}" for name in usage.index]
+    report = usage.to_dict()
+
+    for name, value in structures.items():
+        report[name] = structure_nbytes(value)
+
+    report = pd.Series(report, dtype=np.int64).sort_values(ascending=False)
+    report["total"] = report.sum()
+    return report
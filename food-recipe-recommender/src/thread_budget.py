@@ -0,0 +1,107 @@
+"""
+thread_budget.py
+Module for limiting the BLAS/OpenMP threads used by native libraries.
+
+By default every BLAS/OpenMP call may start a pool with one thread per core.
+That is what model training wants, but several serving processes (shards, app
+workers) doing so at once oversubscribe the CPU and inflate tail latency. Each
+mode therefore has its own per-process thread budget, overridable with an
+environment variable:
+
+    RECIPE_TRAINING_THREADS  (default: every core)
+    RECIPE_SERVING_THREADS   (default: 1 per worker process)
+"""
+
+import os
+from joblib import effective_n_jobs, parallel_config
+from threadpoolctl import threadpool_limits
+
+# Environment variable overriding each mode's thread budget
+THREAD_BUDGET_ENV = {
+    "training": "RECIPE_TRAINING_THREADS",
+    "serving": "RECIPE_SERVING_THREADS",
+}
+
+# Default threads per process for each mode (None uses every core)
+DEFAULT_THREAD_BUDGET = {
+    "training": None,
+    "serving": 1,
+}
+
+
+def _validate_threads(threads, source):
+    """Return threads as a positive int, or raise naming where it came from."""
+    try:
+        value = int(threads)
+    except (TypeError, ValueError):
+        value = 0
+    if value < 1 or str(threads).strip() != str(value):
+        raise ValueError(f"{source} must be a positive integer, got {threads!r}")
+    return value
+
+
+def thread_budget(mode="serving"):
+    """
+    Return the number of BLAS/OpenMP threads a process may use in a mode.
+
+    Args:
+        mode (str): "training" or "serving".
+
+    Returns:
+        int: Thread budget, from the mode's environment variable if set.
+
+    Raises:
+        ValueError: If the mode is unknown or the override is not a positive integer
+    """
+    if mode not in THREAD_BUDGET_ENV:
+        raise ValueError(
+            f"Unknown thread budget mode: {mode}; expected {list(THREAD_BUDGET_ENV)}"
+        )
+
+    override = os.environ.get(THREAD_BUDGET_ENV[mode])
+    if override is not None:
+        return _validate_threads(override, THREAD_BUDGET_ENV[mode])
+    return DEFAULT_THREAD_BUDGET[mode] or os.cpu_count() or 1
+
+
+def limit_threads(mode="serving", threads=None):
+    """
+    Cap the BLAS/OpenMP thread pools of this process.
+
+    Use as a context manager around training code, or call it once when a
+    serving process starts; the returned object's restore_original_limits()
+    undoes the cap.
+
+    Args:
+        mode (str): "training" or "serving", used when threads is None.
+        threads (int): Explicit thread count overriding the mode's budget.
+
+    Returns:
+        threadpoolctl.threadpool_limits: The active limit.
+
+    Raises:
+        ValueError: If the mode is unknown or threads is not a positive integer
+    """
+    if threads is None:
+        threads = thread_budget(mode)
+    else:
+        threads = _validate_threads(threads, "Number of threads")
+    return threadpool_limits(limits=threads)
+
+
+def worker_thread_limit(n_jobs, mode="training"):
+    """
+    Split a mode's thread budget across joblib worker processes.
+
+    Each of the n_jobs workers gets budget // n_jobs threads (at least one),
+    so nested BLAS/OpenMP pools do not multiply the budget.
+
+    Args:
+        n_jobs (int): joblib n_jobs of the parallel call (-1 uses all cores).
+        mode (str): "training" or "serving".
+
+    Returns:
+        joblib.parallel_config: Context manager to wrap the Parallel call in.
+    """
+    threads = max(1, thread_budget(mode) // effective_n_jobs(n_jobs))
+    return parallel_config(backend="loky", inner_max_num_threads=threads)
@@ -6,8 +6,28 @@ Module for input validation and data quality checks in the Recipe Recommender Sy
 import ast
 from pathlib import Path
 import numpy as np
-from sklearn.model_selection import cross_val_score
+import pandas as pd
 from .config import RECIPE_RECOMMENDER_MODEL_FILENAME
+from .leakage_checks import check_leakage
+from .thread_budget import limit_threads
+
+# A quoted Python string literal, allowing escaped characters inside the quotes
+_QUOTED_ITEM = r"""(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")"""
+
+# A stringified list of strings such as "['salt', 'eggs']" (or "[]"), with an
+# optional trailing comma ("['salt',]") and surrounding whitespace (" ['salt']\n")
+# as ast.literal_eval allows
+LIST_LITERAL_PATTERN = (
+    rf"\s*\[\s*(?:{_QUOTED_ITEM}\s*(?:,\s*{_QUOTED_ITEM}\s*)*(?:,\s*)?)?\]\s*"
+)
+
+# Declarative schema for the recipes DataFrame consumed by RecipeRecommender
+RECIPE_SCHEMA = {
+    "name": {"dtype": "string", "nullable": False},
+    "minutes": {"dtype": "number", "nullable": False, "min": 0},
+    "ingredients": {"dtype": "string", "nullable": False, "list_literal": True},
+    "steps": {"dtype": "string", "nullable": False, "list_literal": True},
+}
 
 
 def validate_input_data(recipes_df, required_columns=None):
@@ -190,6 +210,142 @@ def validate_recipe_df_schema(df):
     return True
 
 
+def _is_string_dtype(dtype):
+    """Return True for object or pandas string dtypes."""
+    return dtype == "object" or pd.api.types.is_string_dtype(dtype)
+
+
+def validate_dataframe(df, schema=None, sample_size=None, random_state=42):
+    """
+    Validate every column of a DataFrame against a declarative schema in one pass.
+
+    Each schema entry maps a column name to its rules: ``dtype`` ("number" or
+    "string"), ``nullable``, optional ``min``/``max`` bounds and ``list_literal``
+    for stringified lists of strings. All checks are vectorized over whole columns.
+
+    Args:
+        df (pd.DataFrame): DataFrame to validate
+        schema (dict): Column rules (default: RECIPE_SCHEMA)
+        sample_size (int): Validate a random sample of this many rows instead of
+            the full frame (useful for multi-million-row inputs)
+        random_state (int): Seed for the row sample
+
+    Returns:
+        list: One dict per failure with "column", "check", "message" and the
+            failing row index labels under "rows" (empty when valid)
+    """
+    if schema is None:
+        schema = RECIPE_SCHEMA
+
+    if df.empty:
+        return [
+            {
+                "column": None,
+                "check": "non_empty",
+                "message": "Input DataFrame is empty",
+                "rows": df.index.to_numpy(),
+            }
+        ]
+
+    if sample_size is not None and len(df) > sample_size:
+        df = df.sample(n=sample_size, random_state=random_state)
+
+    failures = []
+
+    def add_failure(column, check, message, mask=None):
+        rows = df.index[mask] if mask is not None else df.index[:0]
+        failures.append(
+            {
+                "column": column,
+                "check": check,
+                "message": message,
+                "rows": rows.to_numpy(),
+            }
+        )
+
+    for col, rules in schema.items():
+        if col not in df.columns:
+            add_failure(col, "exists", f"Missing required column: {col}")
+            continue
+
+        values = df[col]
+        expected_type = rules.get("dtype")
+        if expected_type == "number" and not pd.api.types.is_numeric_dtype(values):
+            add_failure(col, "dtype", f"Column {col} must be numeric")
+            continue
+        if expected_type == "string" and not _is_string_dtype(values.dtype):
+            add_failure(col, "dtype", f"Column {col} must contain strings")
+            continue
+
+        nulls = values.isna().to_numpy()
+        if not rules.get("nullable", True) and nulls.any():
+            add_failure(col, "nullable", f"Null values found in column {col}", nulls)
+
+        if "min" in rules:
+            below = (values < rules["min"]).to_numpy(dtype=bool, na_value=False)
+            if below.any():
+                add_failure(
+                    col, "min", f"Column {col} has values below {rules['min']}", below
+                )
+
+        if "max" in rules:
+            above = (values > rules["max"]).to_numpy(dtype=bool, na_value=False)
+            if above.any():
+                add_failure(
+                    col, "max", f"Column {col} has values above {rules['max']}", above
+                )
+
+        if rules.get("list_literal"):
+            # Non-string cells in an object column do not match either; nulls
+            # are left to the nullable check
+            well_formed = values.str.fullmatch(LIST_LITERAL_PATTERN).to_numpy(
+                dtype=bool, na_value=False
+            )
+            malformed = ~nulls & ~well_formed
+            if malformed.any():
+                add_failure(
+                    col,
+                    "list_literal",
+                    f"Column {col} contains malformed list literals",
+                    malformed,
+                )
+
+    return failures
+
+
+def check_dataframe(df, schema=None, sample_size=None, random_state=42):
+    """
+    Validate a DataFrame against a schema and raise on any failure.
+
+    Args:
+        df (pd.DataFrame): DataFrame to validate
+        schema (dict): Column rules (default: RECIPE_SCHEMA)
+        sample_size (int): Optional number of rows to sample for validation
+        random_state (int): Seed for the row sample
+
+    Returns:
+        bool: True if the DataFrame is valid
+
+    Raises:
+        ValueError: Listing every failed check with example row indices
+    """
+    failures = validate_dataframe(df, schema, sample_size, random_state)
+    if not failures:
+        return True
+
+    details = []
+    for failure in failures:
+        message = failure["message"]
+        rows = failure["rows"]
+        if len(rows):
+            examples = ", ".join(str(row) for row in rows[:5])
+            more = ", ..." if len(rows) > 5 else ""
+            message += f" ({len(rows)} rows: {examples}{more})"
+        details.append(message)
+
+    raise ValueError(f"Data validation failed: {'; '.join(details)}")
+
+
 def check_class_distribution(y_train, y_test):
     """
     Checks the distribution of classes in the training and testing sets.
@@ -206,21 +362,40 @@ def check_class_distribution(y_train, y_test):
     print(y_test.value_counts(normalize=True))
 
 
-def check_data_leakage(X_train, X_test):
+def check_data_leakage(X_train, X_test, near_duplicate_tolerance=None):
     """
     Checks for overlap between training and testing datasets to ensure no data leakage.
     Args:
         X_train: Training feature set.
         X_test: Testing feature set.
+        near_duplicate_tolerance: Optional grid width for a near-duplicate check.
     Returns:
-        None
+        dict: Structured leakage results (see leakage_checks.check_leakage).
     """
-    overlap = set(X_train.index).intersection(set(X_test.index))
-    if overlap:
-        print(f"Data leakage detected! {len(overlap)} overlapping rows.")
-    else:
+    results = check_leakage(X_train, X_test, near_duplicate_tolerance)
+    if results["index_overlap"]:
+        print(f"Data leakage detected! {results['index_overlap']} overlapping rows.")
+    if results["identifier_overlap"]:
+        print(
+            f"Data leakage detected! {results['identifier_overlap']} test recipes "
+            "also appear in training."
+        )
+    if not results["has_leakage"]:
         print("No data leakage detected.")
 
+    # Shared names and repeated feature values are expected across distinct
+    # recipes, so these are reported for information only
+    if results["name_overlap"]:
+        print(f"{results['name_overlap']} test recipes share a name with training.")
+    if results["duplicate_rows"]:
+        print(f"{results['duplicate_rows']} test rows duplicate training feature rows.")
+    if results["near_duplicate_rows"]:
+        print(
+            f"{results['near_duplicate_rows']} test rows nearly duplicate training rows."
+        )
+
+    return results
+
 
 def inspect_feature_correlations(selected_features, target_column):
     """
@@ -236,23 +411,35 @@ def inspect_feature_correlations(selected_features, target_column):
     print(correlations[target_column].sort_values(ascending=False))
 
 
-def cross_validate_model(model, X_train, y_train):
+def cross_validate_model(model, X_train, y_train, cv=5, random_state=42, n_jobs=-1):
     """
-    Performs k-fold cross-validation and prints F1 scores.
+    Performs parallel k-fold cross-validation and prints F1 scores.
     Args:
         model: The model to evaluate.
         X_train: Training feature set.
         y_train: Training target labels.
+        cv: Number of folds.
+        random_state: Seed for the fold shuffling.
+        n_jobs: Number of worker processes (-1 uses all cores); they share the
+            training thread budget (see thread_budget.py).
     Returns:
-        None
+        dict: Evaluation report (see evaluation.run_cross_validation).
     """
+    # The evaluation runner pulls in sklearn, so import it only when needed
+    from .evaluation import run_cross_validation
+
     print("Performing cross-validation...")
-    scores = cross_val_score(model, X_train, y_train, cv=5, scoring="f1")
-    print("Cross-Validation F1 Scores:", scores)
-    print("Mean F1 Score:", scores.mean())
+    report = run_cross_validation(
+        model, X_train, y_train, cv=cv, n_jobs=n_jobs, random_state=random_state
+    )
+    for name, summary in report["models"].items():
+        print(f"{name} Cross-Validation F1 Scores:", summary["scores"])
+        print(f"{name} Mean F1 Score:", summary["mean_score"])
+
+    return report
 
 
-def manually_review_predictions(model, X_test, y_test, sample_size=10):
+def manually_review_predictions(model, X_test, y_test, sample_size=10, random_state=42):
     """
     Manually reviews a random sample of predictions compared to true labels.
     Args:
@@ -260,11 +447,14 @@ def manually_review_predictions(model, X_test, y_test, sample_size=10):
         X_test: Testing feature set.
         y_test: True labels for the test set.
         sample_size: Number of samples to review.
+        random_state: Seed for selecting the sample.
     Returns:
         None
     """
-    sample_indices = np.random.choice(len(y_test), sample_size, replace=False)
-    sample_predictions = model.predict(X_test.iloc[sample_indices])
+    rng = np.random.default_rng(random_state)
+    sample_indices = rng.choice(len(y_test), sample_size, replace=False)
+    with limit_threads("training"):
+        sample_predictions = model.predict(X_test.iloc[sample_indices])
     sample_true = y_test.iloc[sample_indices]
 
     print("Sample Predictions:", sample_predictions)
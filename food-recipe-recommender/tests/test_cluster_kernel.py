@@ -0,0 +1,98 @@
+"""Tests for the sklearn-free cluster assignment kernel."""
+
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+from src.cluster_kernel import (
+    ASSIGNMENT_CHUNK_SIZE,
+    ClusterAssigner,
+    count_assignment_mismatches,
+)
+
+SEEDS = [0, 1, 7, 42]
+
+
+def fit_estimators(seed, n_clusters=6):
+    """Fit a scaler and k-means on (minutes, complexity_score)-like data."""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.integers(1, 61, 2000), rng.integers(1, 101, 2000)])
+    scaler = StandardScaler().fit(X)
+    kmeans = KMeans(n_clusters=n_clusters, random_state=seed, n_init=3)
+    kmeans.fit(scaler.transform(X))
+    return scaler, kmeans
+
+
+def query_points(seed):
+    """Random points plus every point of an integer grid (to provoke ties)."""
+    rng = np.random.default_rng(seed + 1000)
+    random_points = rng.uniform([0, 0], [300, 100], size=(1000, 2))
+    grid = np.stack(np.meshgrid(np.arange(0, 61), np.arange(0, 101)), -1)
+    return np.vstack([random_points, grid.reshape(-1, 2)]).astype(np.float64)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_assign_matches_kmeans_predict(seed):
+    scaler, kmeans = fit_estimators(seed)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+    X = query_points(seed)
+
+    expected = kmeans.predict(scaler.transform(X))
+    np.testing.assert_array_equal(assigner.assign(X), expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_predict_matches_kmeans_predict(seed):
+    scaler, kmeans = fit_estimators(seed)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+    X_scaled = scaler.transform(query_points(seed))
+
+    np.testing.assert_array_equal(assigner.predict(X_scaled), kmeans.predict(X_scaled))
+    assert count_assignment_mismatches(assigner, kmeans, X_scaled) == 0
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_assign_one_matches_kmeans_predict(seed):
+    scaler, kmeans = fit_estimators(seed)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+    X = query_points(seed)[::7]
+
+    expected = kmeans.predict(scaler.transform(X))
+    assert [assigner.assign_one(*point) for point in X] == expected.tolist()
+
+
+@pytest.mark.parametrize(
+    "n_rows",
+    [ASSIGNMENT_CHUNK_SIZE - 1, ASSIGNMENT_CHUNK_SIZE, ASSIGNMENT_CHUNK_SIZE + 1],
+)
+def test_assign_across_chunk_boundary(n_rows):
+    scaler, kmeans = fit_estimators(0)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+    rng = np.random.default_rng(n_rows)
+    X = rng.uniform([0, 0], [300, 100], size=(n_rows, 2))
+
+    labels = assigner.assign(X)
+    assert labels.shape == (n_rows,)
+    np.testing.assert_array_equal(labels, kmeans.predict(scaler.transform(X)))
+
+
+def test_transform_matches_standard_scaler():
+    scaler, kmeans = fit_estimators(3)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+    X = query_points(3)
+
+    np.testing.assert_allclose(assigner.transform(X), scaler.transform(X))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_predict_matches_training_labels(seed):
+    # RecipeRecommender only warns on a mismatch and keeps labels_, so an
+    # exact match is enforced here
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.integers(1, 61, 2000), rng.integers(1, 101, 2000)])
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    kmeans = KMeans(n_clusters=6, random_state=seed, n_init=3).fit(X_scaled)
+    assigner = ClusterAssigner.from_estimators(scaler, kmeans)
+
+    np.testing.assert_array_equal(assigner.predict(X_scaled), kmeans.labels_)
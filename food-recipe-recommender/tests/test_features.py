@@ -0,0 +1,59 @@
+"""Tests for feature selection."""
+
+import numpy as np
+import pandas as pd
+from src.features import rating_stats, select_features
+
+
+def make_recipes(ids):
+    """Recipes with the columns select_features needs."""
+    n = len(ids)
+    return pd.DataFrame(
+        {
+            "id": ids,
+            "name": [f"recipe {i}" for i in range(n)],
+            "minutes": np.arange(10, 10 + n),
+            "n_steps": np.full(n, 5),
+            "n_ingredients": np.full(n, 4),
+            "ingredients": ["['salt']"] * n,
+            "steps": ["['cook']"] * n,
+        }
+    )
+
+
+def make_interactions():
+    return pd.DataFrame(
+        {
+            "recipe_id": [1, 1, 1, 2, 2, 2, 3, 9],
+            "rating": [5, 4, 5, 4, 4, 4, 5, 5],
+        }
+    )
+
+
+def test_rating_stats_counts_and_averages():
+    num_interactions, avg_rating = rating_stats(
+        pd.Series([1, 2, 3, 4]), make_interactions()
+    )
+
+    np.testing.assert_array_equal(num_interactions, [3, 3, 1, 0])
+    np.testing.assert_allclose(avg_rating, [14 / 3, 4.0, 5.0, 0.0])
+
+
+def test_rating_stats_with_duplicate_ids():
+    num_interactions, avg_rating = rating_stats(
+        pd.Series([1, 2, 1, 4]), make_interactions()
+    )
+
+    # Every row of a repeated id gets that id's values, like a merge would
+    np.testing.assert_array_equal(num_interactions, [3, 3, 3, 0])
+    np.testing.assert_allclose(avg_rating, [14 / 3, 4.0, 14 / 3, 0.0])
+
+
+def test_select_features_with_duplicate_ids():
+    recipes = make_recipes([1, 2, 1, 3])
+
+    selected = select_features(recipes, make_interactions())
+
+    assert selected.index.tolist() == [0, 1, 2]
+    assert selected["id"].tolist() == [1, 2, 1]
+    np.testing.assert_array_equal(selected["num_interactions"], [3, 3, 3])
@@ -0,0 +1,29 @@
+"""Tests for the saved model format guard."""
+
+import pickle
+import pytest
+from src.recommender import MODEL_FORMAT_VERSION, RecipeRecommender
+
+
+def make_model(**attributes):
+    """A RecipeRecommender holding only the given attributes."""
+    model = object.__new__(RecipeRecommender)
+    model.__dict__.update(scaler=None, kmeans=None, **attributes)
+    return model
+
+
+def test_round_trip_keeps_attributes():
+    restored = pickle.loads(pickle.dumps(make_model(n_clusters=6)))
+
+    assert restored.n_clusters == 6
+    assert "format_version" not in restored.__dict__
+
+
+def test_state_records_format_version():
+    assert make_model().__getstate__()["format_version"] == MODEL_FORMAT_VERSION
+
+
+@pytest.mark.parametrize("state", [{}, {"format_version": MODEL_FORMAT_VERSION + 1}])
+def test_stale_model_asks_for_retraining(state):
+    with pytest.raises(ValueError, match="retrain the model"):
+        object.__new__(RecipeRecommender).__setstate__({"n_clusters": 6, **state})
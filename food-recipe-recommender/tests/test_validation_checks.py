@@ -0,0 +1,47 @@
+"""Tests for the vectorized DataFrame validation."""
+
+import ast
+import pandas as pd
+import pytest
+from src.validation_checks import validate_dataframe
+
+LIST_SCHEMA = {"ingredients": {"dtype": "string", "list_literal": True}}
+
+
+def malformed_rows(cells):
+    """Index labels validate_dataframe flags as malformed list literals."""
+    failures = validate_dataframe(
+        pd.DataFrame({"ingredients": pd.Series(cells, dtype=object)}), LIST_SCHEMA
+    )
+    return [
+        row
+        for failure in failures
+        if failure["check"] == "list_literal"
+        for row in failure["rows"].tolist()
+    ]
+
+
+@pytest.mark.parametrize(
+    "cell",
+    [
+        "['salt', 'eggs']",
+        "[]",
+        "['salt',]",
+        '["cook\'s salt"]',
+        " ['a']",
+        "['a']\n",
+        "\t['a', 'b'] ",
+    ],
+)
+def test_accepts_list_literals(cell):
+    assert isinstance(ast.literal_eval(cell), list)
+    assert malformed_rows([cell]) == []
+
+
+@pytest.mark.parametrize("cell", ["salt, eggs", "['salt'", "['a'] x", "[1, 2]", "[,]"])
+def test_rejects_malformed_cells(cell):
+    assert malformed_rows([cell]) == [0]
+
+
+def test_non_string_cells_are_malformed_and_nulls_are_not():
+    assert malformed_rows(["['a']", 3, None]) == [1]